@@ -1,9 +1,18 @@
 """
 Context processors for TastyTrade app
 """
+from apps.tastytrade.middleware import get_credential
 from apps.tastytrade.models import Position, Transaction, TastyTradeCredential
 
 
+def _credential(request):
+    """Credential loaded by TastyTradeCredentialMiddleware (looked up here
+    for requests that didn't go through it, e.g. RequestFactory ones)"""
+    if hasattr(request, 'tastytrade_credential'):
+        return request.tastytrade_credential
+    return get_credential(request.user)
+
+
 def tastytrade_credential(request):
     """
     Add TastyTrade credential to template context on all pages
@@ -13,11 +22,7 @@ def tastytrade_credential(request):
     }
     
     if request.user.is_authenticated:
-        try:
-            credential = request.user.tastytrade_credential
-            context['tastytrade_credential'] = credential
-        except TastyTradeCredential.DoesNotExist:
-            pass
+        context['tastytrade_credential'] = _credential(request)
     
     return context
 
@@ -31,21 +36,17 @@ def tastytrade_accounts(request):
         'user_has_tastytrade': False,
     }
     
-    if request.user.is_authenticated:
-        try:
-            credential = request.user.tastytrade_credential
-            context['user_has_tastytrade'] = True
-            
-            # Get available accounts from positions (most reliable source)
-            accounts = Position.objects.filter(
-                user=request.user, 
-                credential=credential
-            ).values_list('tastytrade_account_number', flat=True).distinct().order_by('tastytrade_account_number')
-            
-            context['available_accounts'] = list(accounts)
-            
-        except TastyTradeCredential.DoesNotExist:
-            # User doesn't have TastyTrade credential
-            pass
+    credential = _credential(request) if request.user.is_authenticated else None
+    if credential:
+        context['user_has_tastytrade'] = True
+        
+        # Get available accounts from positions (most reliable source)
+        accounts = Position.objects.filter(
+            user=request.user, 
+            credential=credential
+        ).values_list('tastytrade_account_number', flat=True).distinct().order_by('tastytrade_account_number')
+        
+        context['available_accounts'] = list(accounts)
     
-    return context
\ No newline at end of file
+    return context
+
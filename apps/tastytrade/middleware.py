@@ -0,0 +1,63 @@
+"""
+Middleware for TastyTrade app
+"""
+from django.contrib import messages
+from django.utils.functional import SimpleLazyObject
+
+from apps.tastytrade.models import TastyTradeCredential
+from apps.tastytrade.tasks import sync_in_background, sync_task_result
+
+
+def get_credential(user):
+    """TastyTrade credential of user, or None. Django caches the result (a
+    missing one too) on the user, so a second lookup doesn't query"""
+    try:
+        return user.tastytrade_credential
+    except TastyTradeCredential.DoesNotExist:
+        return None
+
+
+class TastyTradeCredentialMiddleware:
+    """
+    Load the signed-in user's credential at most once per request, as
+    request.tastytrade_credential (falsy when there is none or for anonymous
+    users). The lookup is lazy, so requests that never read it (e.g. the
+    cached JSON endpoints) skip the query; context processors and views
+    share it otherwise
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tastytrade_credential = SimpleLazyObject(
+            lambda: get_credential(request.user) if request.user.is_authenticated else None
+        )
+        return self.get_response(request)
+
+
+class BackgroundSyncMiddleware:
+    """
+    Check the user's queued background sync once per request, as
+    request.background_sync ({'task_id', 'state', 'error'}, or None when no
+    sync is queued). The first request after it finished adds a message
+    with its outcome and forgets the task. Must come after
+    MessageMiddleware
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.background_sync = None
+        task_id = request.session.get('sync_task_id')
+        if task_id is not None and sync_in_background():
+            state, error = sync_task_result(task_id)
+            request.background_sync = {'task_id': task_id, 'state': state, 'error': error}
+            if state == 'SUCCESS':
+                messages.success(request, "Sync completed successfully.")
+                del request.session['sync_task_id']
+            elif state == 'FAILURE':
+                messages.error(request, error)
+                del request.session['sync_task_id']
+        return self.get_response(request)
@@ -0,0 +1,48 @@
+import apps.tastytrade.models
+from django.db import migrations, models
+
+
+def populate_position_key(apps, schema_editor):
+    """Fill position_key for existing rows, keeping only the most recently
+    updated row of each key (NULL columns let duplicates in before)"""
+    from apps.tastytrade.models import position_key
+
+    Position = apps.get_model('tastytrade', 'Position')
+    kept = {}
+    duplicates = []
+    for position in Position.objects.order_by('-last_updated', '-pk').iterator():
+        position.position_key = position_key(
+            position.asset_type, position.symbol, position.expiry, position.strike, position.option_type
+        )
+        scope = (position.user_id, position.credential_id, position.tastytrade_account_number, position.position_key)
+        if scope in kept:
+            duplicates.append(position.pk)
+        else:
+            kept[scope] = position
+    Position.objects.filter(pk__in=duplicates).delete()
+    Position.objects.bulk_update(kept.values(), ['position_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tastytrade', '0007_tradingstrategy_strategyleg_strategyedithistory_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='position_key',
+            field=apps.tastytrade.models.PositionKeyField(default='', editable=False, max_length=128),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_position_key, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='position',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='position',
+            constraint=models.UniqueConstraint(fields=('user', 'credential', 'tastytrade_account_number', 'position_key'), name='tastytrade_position_unique_key'),
+        ),
+    ]
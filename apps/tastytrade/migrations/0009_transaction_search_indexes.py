@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+# The transactions search ORs icontains over these columns, which PostgreSQL
+# runs as UPPER(col::text) LIKE UPPER('%q%'); a trigram GIN index on the same
+# expressions turns that sequential scan into a bitmap index scan
+TRIGRAM_COLUMNS = ('symbol', 'description', 'transaction_type')
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    expressions = ', '.join(f'UPPER("{column}"::text) gin_trgm_ops' for column in TRIGRAM_COLUMNS)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS txn_trgm_idx ON tastytrade_transaction USING gin ({expressions})'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS txn_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tastytrade', '0008_position_position_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'credential', 'transaction_type'], name='txn_user_cred_type_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
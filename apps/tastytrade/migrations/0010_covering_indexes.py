@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tastytrade', '0009_transaction_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['user', 'credential', 'tastytrade_account_number'], include=('market_value', 'unrealized_pnl', 'daily_unrealized_pnl', 'delta', 'theta'), name='pos_user_acct_totals'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'credential', 'tastytrade_account_number', '-trade_date'], include=('amount', 'symbol', 'transaction_type'), name='txn_user_acct_date'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Built-in trigger function: recomputes search_vector from the listed columns
+# on every INSERT/UPDATE, so Django never has to write it
+CREATE_TRIGGER = """
+CREATE TRIGGER txn_search_vector_update
+BEFORE INSERT OR UPDATE ON tastytrade_transaction
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.simple', symbol, description, transaction_type)
+"""
+
+BACKFILL = """
+UPDATE tastytrade_transaction SET search_vector = to_tsvector(
+    'pg_catalog.simple', symbol || ' ' || description || ' ' || transaction_type
+)
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+    schema_editor.execute(BACKFILL)
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS txn_search_vector_idx ON tastytrade_transaction USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS txn_search_vector_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS txn_search_vector_update ON tastytrade_transaction')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tastytrade', '0010_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
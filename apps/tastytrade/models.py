@@ -1,3 +1,6 @@
+from decimal import Decimal
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
@@ -7,6 +10,12 @@ try:
 except ImportError:
     EncryptedCharField = models.CharField  # fallback for earlier Django versions
 
+# django-fast-update is optional; it adds fast_update() (UPDATE ... FROM VALUES)
+try:
+    from fast_update.query import FastUpdateManager
+except ImportError:
+    FastUpdateManager = models.Manager
+
 class TastyTradeCredential(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tastytrade_credential')
     environment = models.CharField(max_length=16, choices=[('prod', 'Production'), ('sandbox', 'Sandbox')], default='prod')
@@ -21,6 +30,27 @@ class TastyTradeCredential(models.Model):
     def __str__(self):
         return f"{self.user.username} ({self.environment})"
 
+def position_key(asset_type, symbol, expiry, strike, option_type):
+    """One-string natural key of a position. Unlike the separate columns it is
+    never NULL, so a unique constraint on it also holds for stocks, which have
+    no expiry, strike or option type"""
+    if strike is not None:
+        strike = format(Decimal(str(strike)).normalize(), 'f')
+    return '|'.join('' if part is None else str(part) for part in (asset_type, symbol, expiry, strike, option_type))
+
+
+class PositionKeyField(models.CharField):
+    """position_key() of the row, recomputed by save() and bulk_create()"""
+
+    def pre_save(self, model_instance, add):
+        value = position_key(
+            model_instance.asset_type, model_instance.symbol, model_instance.expiry,
+            model_instance.strike, model_instance.option_type,
+        )
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class Position(models.Model):
     ASSET_TYPE_CHOICES = [
         ("stock", "Stock"),
@@ -52,11 +82,28 @@ class Position(models.Model):
     strike = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
     option_type = models.CharField(max_length=4, choices=[("call", "Call"), ("put", "Put")], null=True, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
+    position_key = PositionKeyField(max_length=128, editable=False)
+
+    objects = FastUpdateManager()
 
     class Meta:
-        unique_together = ("user", "credential", "tastytrade_account_number", "asset_type", "symbol", "expiry", "strike", "option_type")
+        # On (asset_type, symbol, expiry, strike, option_type) via position_key:
+        # NULLs never conflict, so the columns themselves can't carry it
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "credential", "tastytrade_account_number", "position_key"],
+                name="tastytrade_position_unique_key",
+            ),
+        ]
         indexes = [
             models.Index(fields=["user", "tastytrade_account_number", "asset_type", "symbol"]),
+            # Index-only scans for the dashboard and positions page sums
+            # (include= is ignored outside PostgreSQL)
+            models.Index(
+                fields=["user", "credential", "tastytrade_account_number"],
+                include=["market_value", "unrealized_pnl", "daily_unrealized_pnl", "delta", "theta"],
+                name="pos_user_acct_totals",
+            ),
         ]
 
     def __str__(self):
@@ -91,11 +138,28 @@ class Transaction(models.Model):
     strategy = models.ForeignKey('TradingStrategy', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions', help_text="Associated trading strategy")
     
     created_at = models.DateTimeField(auto_now_add=True)
+    # symbol, description and transaction_type as a tsvector, kept current by
+    # a PostgreSQL trigger (NULL on other databases)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = FastUpdateManager()
 
     class Meta:
         indexes = [
             models.Index(fields=["user", "tastytrade_account_number", "transaction_type", "symbol"]),
+            # Exact type filter of the transactions page
+            models.Index(fields=["user", "credential", "transaction_type"], name="txn_user_cred_type_idx"),
+            # Per-account history newest first (and sync's last-trade lookup);
+            # include= (PostgreSQL only) lets the dashboard sums skip the heap
+            models.Index(
+                fields=["user", "credential", "tastytrade_account_number", "-trade_date"],
+                include=["amount", "symbol", "transaction_type"],
+                name="txn_user_acct_date",
+            ),
         ]
+        # The search box's trigram and full-text GIN indexes are
+        # PostgreSQL-only and live in migrations 0009 (txn_trgm_idx) and 0011
+        # (txn_search_vector_idx)
         ordering = ["-trade_date"]
 
     def __str__(self):
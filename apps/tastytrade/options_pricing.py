@@ -1,9 +1,21 @@
 """
 Options pricing and Greeks calculations using Black-Scholes model
 """
+import logging
 import math
 from datetime import date, datetime
-from typing import Tuple, Optional
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from numba import njit, prange
+except ImportError:  # Numba is optional; Greeks fall back to the pure-Python kernel
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# (spot, strike, time_to_expiry, volatility, is_call) for one option
+GreekInputs = Tuple[float, float, float, float, bool]
 
 
 def normal_cdf(x: float) -> float:
@@ -76,6 +88,88 @@ def black_scholes_greeks(
     return option_price, delta, gamma, theta, vega
 
 
+def _bs_delta_theta(spot, strike, time_to_expiry, volatility, risk_free_rate, is_call):
+    """
+    Black-Scholes delta and daily theta only, matching black_scholes_greeks
+    
+    Kept free of Python-level helpers so Numba can compile it when available.
+    """
+    if time_to_expiry <= 0.0:
+        return 0.0, 0.0
+    
+    sqrt_t = math.sqrt(time_to_expiry)
+    d1 = (math.log(spot / strike) +
+          (risk_free_rate + 0.5 * volatility * volatility) * time_to_expiry) / (volatility * sqrt_t)
+    d2 = d1 - volatility * sqrt_t
+    n_d1 = math.exp(-0.5 * d1 * d1) / math.sqrt(2.0 * math.pi)
+    discounted_strike = strike * math.exp(-risk_free_rate * time_to_expiry)
+    time_decay = -spot * n_d1 * volatility / (2.0 * sqrt_t)
+    
+    if is_call:
+        delta = 0.5 * (1.0 + math.erf(d1 / math.sqrt(2.0)))
+        theta = (time_decay - risk_free_rate * discounted_strike * 0.5 * (1.0 + math.erf(d2 / math.sqrt(2.0)))) / 365.0
+    else:
+        delta = 0.5 * (1.0 + math.erf(d1 / math.sqrt(2.0))) - 1.0
+        theta = (time_decay + risk_free_rate * discounted_strike * 0.5 * (1.0 + math.erf(-d2 / math.sqrt(2.0)))) / 365.0
+    return delta, theta
+
+
+if njit is not None:
+    _bs_delta_theta = njit(cache=True, fastmath=True)(_bs_delta_theta)
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _bs_delta_theta_batch(spot, strike, time_to_expiry, volatility, risk_free_rate, is_call):
+        """Compiled, multi-core delta/theta over arrays of option inputs"""
+        n = spot.shape[0]
+        delta = np.empty(n)
+        theta = np.empty(n)
+        for i in prange(n):
+            row_delta, row_theta = _bs_delta_theta(
+                spot[i], strike[i], time_to_expiry[i], volatility[i], risk_free_rate, is_call[i]
+            )
+            delta[i] = row_delta
+            theta[i] = row_theta
+        return delta, theta
+
+
+def black_scholes_delta_theta_batch(
+    inputs: Sequence[GreekInputs],
+    risk_free_rate: float = 0.05
+) -> List[Tuple[Optional[float], Optional[float]]]:
+    """
+    Calculate delta and theta for many options in one pass
+    
+    Args:
+        inputs: Sequence of (spot, strike, time_to_expiry, volatility, is_call)
+        risk_free_rate: Risk-free interest rate (default 5%)
+    
+    Returns:
+        List of (delta, theta) in input order; (None, None) where a row cannot be priced
+    """
+    if not inputs:
+        return []
+    
+    if njit is not None:
+        spot, strike, time_to_expiry, volatility, is_call = (np.array(column) for column in zip(*inputs))
+        delta, theta = _bs_delta_theta_batch(
+            spot.astype(np.float64), strike.astype(np.float64),
+            time_to_expiry.astype(np.float64), volatility.astype(np.float64),
+            risk_free_rate, is_call.astype(np.bool_)
+        )
+        return [
+            (d, t) if math.isfinite(d) and math.isfinite(t) else (None, None)
+            for d, t in zip(delta.tolist(), theta.tolist())
+        ]
+    
+    results = []
+    for spot, strike, time_to_expiry, volatility, is_call in inputs:
+        try:
+            results.append(_bs_delta_theta(spot, strike, time_to_expiry, volatility, risk_free_rate, is_call))
+        except (ValueError, ZeroDivisionError):
+            results.append((None, None))
+    return results
+
+
 def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Optional[float], Optional[str]]:
     """
     Parse option symbol to extract underlying, expiry, strike, and option type
@@ -84,15 +178,12 @@ def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Opt
     - "./GCQ5 OGQ5  250728C5000" -> ("GCQ5", date(2025,7,28), 5000.0, "call")
     """
     try:
-        print(f"DEBUG: Parsing option symbol: '{symbol}'")
-        
         # Handle futures options format: "./GCQ5 OGQ5  250728C5000"
         if symbol.startswith('./'):
             parts = symbol.strip().split()
             if len(parts) >= 3:
                 underlying = parts[0][2:]  # Remove "./"
                 option_part = parts[2]  # Skip the second part (OGQ5)
-                print(f"DEBUG: Futures option - underlying: {underlying}, option_part: {option_part}")
             else:
                 return None, None, None, None
         else:
@@ -103,7 +194,6 @@ def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Opt
             
             underlying = parts[0]
             option_part = parts[1]
-            print(f"DEBUG: Equity option - underlying: {underlying}, option_part: {option_part}")
         
         # Extract date (YYMMDD format)
         if len(option_part) >= 6:
@@ -112,9 +202,8 @@ def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Opt
             month = int(date_str[2:4])
             day = int(date_str[4:6])
             expiry = date(year, month, day)
-            print(f"DEBUG: Parsed expiry: {expiry}")
         else:
-            print(f"DEBUG: Could not parse date from option_part: {option_part}")
+            logger.debug("Could not parse date from option_part: %s", option_part)
             return underlying, None, None, None
         
         # Extract option type (C/P)
@@ -125,11 +214,10 @@ def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Opt
             elif option_type == 'P':
                 option_type = 'put'
             else:
-                print(f"DEBUG: Unrecognized option type: {option_type}")
+                logger.debug("Unrecognized option type: %s", option_type)
                 return underlying, expiry, None, None
-            print(f"DEBUG: Parsed option type: {option_type}")
         else:
-            print(f"DEBUG: Could not parse option type from option_part: {option_part}")
+            logger.debug("Could not parse option type from option_part: %s", option_part)
             return underlying, expiry, None, None
         
         # Extract strike price 
@@ -155,41 +243,37 @@ def parse_option_symbol(symbol: str) -> Tuple[Optional[str], Optional[date], Opt
             else:
                 # Equity options - divide by 1000
                 strike = float(strike_str) / 1000.0
-            print(f"DEBUG: Parsed strike: {strike}")
         else:
-            print(f"DEBUG: Could not parse strike from option_part: {option_part}")
+            logger.debug("Could not parse strike from option_part: %s", option_part)
             return underlying, expiry, None, option_type
         
-        result = (underlying, expiry, strike, option_type)
-        print(f"DEBUG: Final parsed result: {result}")
-        return result
+        return underlying, expiry, strike, option_type
         
     except Exception as e:
-        print(f"DEBUG: Error parsing option symbol {symbol}: {e}")
+        logger.debug("Error parsing option symbol %s: %s", symbol, e)
         return None, None, None, None
 
 
-def calculate_option_greeks(
+def option_greek_inputs(
     symbol: str,
     current_price: float,
     strike_price: Optional[float],
     expiry_date: Optional[date],
-    option_type: Optional[str],
-    volatility: float = 0.25
-) -> Tuple[Optional[float], Optional[float]]:
+    option_type: Optional[str]
+) -> Optional[GreekInputs]:
     """
-    Calculate delta and theta for an option position
+    Resolve the Black-Scholes inputs for an option position
     
     Args:
         symbol: Option symbol
-        current_price: Current underlying price
+        current_price: Current option price
         strike_price: Strike price of option
         expiry_date: Expiration date
         option_type: "call", "put", "C", or "P"
-        volatility: Estimated volatility (default 25%)
     
     Returns:
-        Tuple of (delta, theta) or (None, None) if calculation fails
+        Tuple of (spot, strike, time_to_expiry, volatility, is_call), or None if
+        the option cannot be priced. Expired options get a time_to_expiry of 0.
     """
     try:
         # If we don't have parsed option data, try to extract from symbol
@@ -208,17 +292,15 @@ def calculate_option_greeks(
             underlying_price = estimate_underlying_price_from_option_data(
                 symbol, current_price, strike_price, option_type, expiry_date
             )
-            print(f"DEBUG: Estimated underlying price {underlying_price} from option price {current_price}")
         else:
             underlying_price = current_price
-            print(f"DEBUG: Using option price {current_price} as underlying (incomplete option data)")
         
         # Validate inputs
         if not all([current_price, strike_price, expiry_date, option_type]):
-            return None, None
+            return None
         
         if current_price <= 0 or strike_price <= 0:
-            return None, None
+            return None
         
         # Calculate time to expiry
         if isinstance(expiry_date, str):
@@ -228,18 +310,18 @@ def calculate_option_greeks(
         days_to_expiry = (expiry_date - today).days
         
         if days_to_expiry <= 0:
-            return 0.0, 0.0
+            return float(underlying_price), float(strike_price), 0.0, 0.25, True
         
         time_to_expiry = days_to_expiry / 365.0
         
         # Normalize option type
         opt_type = option_type.lower()
         if opt_type in ['c', 'call']:
-            opt_type = 'call'
+            is_call = True
         elif opt_type in ['p', 'put']:
-            opt_type = 'put'
+            is_call = False
         else:
-            return None, None
+            return None
         
         # Estimate volatility based on underlying type
         if symbol.startswith('./'):
@@ -262,23 +344,40 @@ def calculate_option_greeks(
             volatility = 0.20  # ETF volatility
         else:
             volatility = 0.25  # Default
-            
-        print(f"DEBUG: Using underlying_price={underlying_price}, volatility={volatility} for {symbol}")
-        
-        # Calculate Greeks using Black-Scholes
-        _, delta, gamma, theta, vega = black_scholes_greeks(
-            spot_price=underlying_price,
-            strike_price=strike_price,
-            time_to_expiry=time_to_expiry,
-            volatility=volatility,
-            option_type=opt_type
-        )
         
-        return delta, theta
+        return float(underlying_price), float(strike_price), time_to_expiry, volatility, is_call
         
     except Exception as e:
-        print(f"DEBUG: Error calculating Greeks for {symbol}: {e}")
+        logger.debug("Error preparing Greeks inputs for %s: %s", symbol, e)
+        return None
+
+
+def calculate_option_greeks(
+    symbol: str,
+    current_price: float,
+    strike_price: Optional[float],
+    expiry_date: Optional[date],
+    option_type: Optional[str],
+    volatility: float = 0.25
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Calculate delta and theta for an option position
+    
+    Args:
+        symbol: Option symbol
+        current_price: Current underlying price
+        strike_price: Strike price of option
+        expiry_date: Expiration date
+        option_type: "call", "put", "C", or "P"
+        volatility: Estimated volatility (default 25%)
+    
+    Returns:
+        Tuple of (delta, theta) or (None, None) if calculation fails
+    """
+    inputs = option_greek_inputs(symbol, current_price, strike_price, expiry_date, option_type)
+    if inputs is None:
         return None, None
+    return black_scholes_delta_theta_batch([inputs])[0]
 
 
 def estimate_underlying_price_from_option_data(symbol: str, option_price: float, strike: float, option_type: str, expiry_date) -> float:
@@ -327,7 +426,7 @@ def estimate_underlying_price_from_option_data(symbol: str, option_price: float,
         return max(estimated_price, strike * 0.5)  # Don't go below 50% of strike
         
     except Exception as e:
-        print(f"DEBUG: Error estimating underlying price for {symbol}: {e}")
+        logger.debug("Error estimating underlying price for %s: %s", symbol, e)
         return strike  # Fallback to strike price
 
 
@@ -0,0 +1,339 @@
+"""
+Background tasks for the TastyTrade app
+
+Celery is optional: without it (or without a broker configured) the sync
+view calls run_sync() in the request instead of queueing the task.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+import logging
+import threading
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.tastytrade.models import TastyTradeCredential, Position, Transaction, position_key
+from .tastytrade_api import TastyTradeAPI
+
+try:
+    from celery import shared_task
+    from celery.result import AsyncResult
+except ImportError:
+    shared_task = None
+    AsyncResult = None
+
+logger = logging.getLogger(__name__)
+
+# Transaction columns compared against, and refreshed from, TastyTrade when a
+# synced transaction already exists
+TRANSACTION_SYNC_FIELDS = [
+    "transaction_type", "symbol", "description", "quantity", "price", "amount",
+    "trade_date", "asset_type", "expiry", "strike", "option_type",
+]
+
+# Unique constraint that sync's position upsert conflicts on
+POSITION_CONFLICT_FIELDS = ["user", "credential", "tastytrade_account_number", "position_key"]
+
+# Position columns overwritten when the upsert hits a stored row
+POSITION_SYNC_FIELDS = [
+    "description", "quantity", "average_price", "current_price", "previous_close_price",
+    "market_value", "unrealized_pnl", "daily_unrealized_pnl", "realized_pnl",
+    "delta", "theta", "beta", "last_updated",
+]
+
+# Rows per fetch when sync streams stored positions/transactions into its
+# lookup dicts (server-side cursor on PostgreSQL); only the dict is kept
+SYNC_PREFETCH_CHUNK_SIZE = 5000
+
+# fast_update() builds one UPDATE ... FROM (VALUES ...) per batch, which stays
+# cheap to plan at sizes where bulk_update()'s CASE WHEN statement does not
+FAST_UPDATE_BATCH_SIZE = 10000
+
+# Threads fetching positions/transactions at once, each on its own session
+SYNC_FETCH_WORKERS = 8
+
+
+def _bulk_update(model, objs, fields):
+    """Write fields of saved objs with fast_update() when django-fast-update
+    is installed, else with bulk_update()"""
+    manager = model.objects
+    if hasattr(manager, 'fast_update'):
+        return manager.fast_update(list(objs), fields, batch_size=FAST_UPDATE_BATCH_SIZE)
+    return manager.bulk_update(objs, fields, batch_size=settings.TASTY_BULK_BATCH_SIZE)
+
+
+def _fetch_account_data(api, start_dates):
+    """{account_number: (positions, transactions)} for every account of
+    start_dates. The fetches are independent HTTP round trips, so they run
+    concurrently on threads, each with its own copy of api and session"""
+    worker = threading.local()
+    worker_apis = []
+
+    def start_worker():
+        worker.api = api.with_own_session()
+        worker_apis.append(worker.api)
+
+    def fetch_positions(account_number):
+        return worker.api.fetch_positions(account_number)
+
+    def fetch_transactions(account_number, start_date):
+        return worker.api.fetch_transactions(account_number, start_date=start_date, as_model=Transaction)
+
+    workers = min(SYNC_FETCH_WORKERS, 2 * len(start_dates)) or 1
+    try:
+        with ThreadPoolExecutor(max_workers=workers, initializer=start_worker) as pool:
+            futures = {
+                account_number: (
+                    pool.submit(fetch_positions, account_number),
+                    pool.submit(fetch_transactions, account_number, start_date),
+                )
+                for account_number, start_date in start_dates.items()
+            }
+            return {
+                account_number: (positions.result(), transactions.result())
+                for account_number, (positions, transactions) in futures.items()
+            }
+    finally:
+        for worker_api in worker_apis:
+            worker_api.session.close()
+
+
+def _price_change_pnl(price, reference_price, quantity, multiplier):
+    """(price - reference_price) × quantity × multiplier, or None unless both
+    prices are set. Exact Decimal arithmetic, like the NUMERIC columns it is
+    stored in (API values may be floats, strings or Decimals)"""
+    if not price or not reference_price:
+        return None
+    return (
+        (Decimal(str(price)) - Decimal(str(reference_price)))
+        * Decimal(str(quantity)) * Decimal(str(multiplier))
+    )
+
+
+class SyncError(Exception):
+    """Sync stopped for a reason that is shown to the user as is"""
+
+
+def run_sync(user, credential):
+    """Fetch the accounts, positions and transactions of credential from
+    TastyTrade and store them for user"""
+    api = TastyTradeAPI(credential)
+    logger.debug("Starting sync process using %s authentication...", api.auth_method)
+    api.authenticate()
+    logger.debug("Authentication successful! %s token acquired.", api.auth_method.title())
+    logger.debug("Testing session with user info endpoint...")
+    session_test = api.test_session()
+    logger.debug("Session test result: %s", session_test)
+    logger.debug("Now attempting to fetch accounts...")
+    account_numbers = api.fetch_accounts()
+    logger.debug("Account numbers retrieved: %s", account_numbers)
+    if not account_numbers:
+        raise SyncError("No TastyTrade accounts found for this user.")
+    
+    # Get the most recent transaction date of every account (one query) for
+    # incremental sync
+    last_trade_dates = dict(
+        Transaction.objects.filter(
+            user=user,
+            credential=credential,
+            tastytrade_account_number__in=account_numbers,
+        ).values_list('tastytrade_account_number').annotate(last_trade_date=Max('trade_date'))
+    )
+    start_dates = {}
+    for account_number in account_numbers:
+        start_date = None
+        last_trade_date = last_trade_dates.get(account_number)
+        if last_trade_date:
+            # Get transactions from 1 day before the last transaction to ensure we don't miss any
+            start_date = last_trade_date.date() - timedelta(days=1)
+            logger.debug("Incremental sync of %s from %s (last transaction: %s)", account_number, start_date, last_trade_date.date())
+        else:
+            logger.debug("First sync of %s - fetching all transactions", account_number)
+        start_dates[account_number] = start_date
+    
+    # All HTTP before the transaction opens, so it isn't held across the network
+    fetched = _fetch_account_data(api, start_dates)
+    
+    with db_transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Don't wait for the WAL flush at commit. A crash right after
+            # can lose this sync's writes, but never corrupts anything, and
+            # sync is idempotent: the next run fetches the same data again.
+            # SET LOCAL ends with the transaction
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL synchronous_commit = off")
+        for account_number in account_numbers:
+            logger.debug("Processing account %s", account_number)
+            start_date = start_dates[account_number]
+            positions, transactions = fetched[account_number]
+            logger.debug("Retrieved %s positions", len(positions))
+            logger.debug("Retrieved %s transactions", len(transactions))
+            
+            # Upsert positions with daily P&L tracking; rows are collected
+            # and written in batches after the loop. One query loads the
+            # stored price of every position of the account, by its
+            # position_key string, as their previous close
+            previous_prices = dict(
+                Position.objects.filter(
+                    user=user,
+                    credential=credential,
+                    tastytrade_account_number=account_number,
+                ).values_list("position_key", "current_price").iterator(chunk_size=SYNC_PREFETCH_CHUNK_SIZE)
+            )
+            # One row per key: a single upsert can't touch a row twice
+            positions_to_upsert = {}
+            for pos in positions:
+                if pos.get("symbol"):  # Only process if we have a symbol
+                    # Get current price from API data
+                    new_current_price = pos.get("current_price")  # We'll update the API to include this
+                    
+                    asset_type = pos.get("asset_type", "other")
+                    expiry, strike, option_type = pos.get("expiry"), pos.get("strike"), pos.get("option_type")
+                    # Same string as the stored position_key column (the
+                    # strike normalised, so "150.0" matches 150.0000)
+                    key = position_key(asset_type, pos["symbol"], expiry, strike, option_type)
+                    # Store current price as previous close price (none
+                    # for a new position); a repeated row sees the price
+                    # of the one before it
+                    previous_close_price = previous_prices.get(key)
+                    previous_prices[key] = new_current_price
+                    existing_position = Position(
+                        user=user,
+                        credential=credential,
+                        tastytrade_account_number=account_number,
+                        asset_type=asset_type,
+                        symbol=pos["symbol"],
+                        expiry=expiry,
+                        strike=strike,
+                        option_type=option_type,
+                        position_key=key,
+                    )
+                    positions_to_upsert[key] = existing_position
+                    
+                    quantity = pos.get("quantity", 0)
+                    multiplier = pos.get("multiplier", 1)  # Use multiplier from API
+                    # Daily unrealized P&L if we have both prices
+                    daily_unrealized_pnl = _price_change_pnl(new_current_price, previous_close_price, quantity, multiplier)
+                    # Proper unrealized P&L: (current_price - average_price) × quantity
+                    corrected_unrealized_pnl = _price_change_pnl(new_current_price, pos.get("average_price"), quantity, multiplier)
+                    
+                    existing_position.description = pos.get("description", "")
+                    existing_position.quantity = pos.get("quantity", 0)
+                    existing_position.average_price = pos.get("average_price")
+                    existing_position.current_price = new_current_price
+                    existing_position.previous_close_price = previous_close_price
+                    existing_position.market_value = pos.get("market_value")
+                    existing_position.unrealized_pnl = corrected_unrealized_pnl if corrected_unrealized_pnl is not None else pos.get("unrealized_pnl")
+                    existing_position.daily_unrealized_pnl = daily_unrealized_pnl
+                    existing_position.realized_pnl = 0  # Only set when position is fully closed
+                    existing_position.delta = pos.get("delta")
+                    existing_position.theta = pos.get("theta")
+                    existing_position.beta = pos.get("beta")
+
+            # INSERT ... ON CONFLICT DO UPDATE on the non-null
+            # position_key: new and stored positions in one statement
+            # per batch (bulk_create() fills last_updated and the key)
+            Position.objects.bulk_create(
+                positions_to_upsert.values(),
+                batch_size=settings.TASTY_BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=POSITION_CONFLICT_FIELDS,
+                update_fields=POSITION_SYNC_FIELDS,
+            )
+            # Upsert transactions with deduplication
+            transactions_saved = 0
+            transactions_skipped = 0
+            transactions_updated = 0
+            transactions_unchanged = 0
+            
+            # Load the stored transactions the fetch can overlap, for change detection
+            # Only check recent transactions if doing incremental sync
+            transaction_filter = {
+                'user': user,
+                'credential': credential,
+                'tastytrade_account_number': account_number
+            }
+            if start_date:
+                # Include a buffer to ensure we catch all relevant transactions
+                buffer_date = start_date - timedelta(days=2)
+                transaction_filter['trade_date__gte'] = buffer_date
+            
+            existing_transactions = {
+                t.transaction_id: t
+                for t in Transaction.objects.filter(**transaction_filter).iterator(
+                    chunk_size=SYNC_PREFETCH_CHUNK_SIZE
+                )
+            }
+            
+            new_transactions = []
+            changed_transactions = []
+            for txn in transactions:
+                if not txn.transaction_id or not txn.trade_date:
+                    transactions_skipped += 1
+                    continue
+
+                stored = existing_transactions.get(txn.transaction_id)
+                if stored is None:
+                    new_transactions.append(txn)
+                    transactions_saved += 1
+                    continue
+
+                # Only rewrite rows whose TastyTrade data actually changed
+                changed = False
+                for field in TRANSACTION_SYNC_FIELDS:
+                    value = getattr(txn, field)
+                    if getattr(stored, field) != value:
+                        setattr(stored, field, value)
+                        changed = True
+                if changed:
+                    changed_transactions.append(stored)
+                    transactions_updated += 1
+                else:
+                    transactions_unchanged += 1
+
+            # New ids in one INSERT per batch; an id stored outside the
+            # lookup window is left as it is rather than failing the sync
+            Transaction.objects.bulk_create(
+                new_transactions,
+                batch_size=settings.TASTY_BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            _bulk_update(Transaction, changed_transactions, TRANSACTION_SYNC_FIELDS)
+            
+            logger.debug("Transaction summary for account %s: %s new, %s updated, %s unchanged, %s skipped", account_number, transactions_saved, transactions_updated, transactions_unchanged, transactions_skipped)
+        credential.last_sync = timezone.now()
+        credential.save(update_fields=["last_sync"])
+
+
+def sync_in_background():
+    """True when sync should be queued as a Celery task"""
+    return shared_task is not None and bool(getattr(settings, 'CELERY_BROKER_URL', None))
+
+
+def sync_task_result(task_id):
+    """Celery state of a queued sync (PENDING, STARTED, RETRY, SUCCESS,
+    FAILURE) and, for FAILURE, the message to show the user"""
+    result = AsyncResult(task_id)
+    state = result.state
+    if state != 'FAILURE':
+        return state, None
+    error = result.result
+    return state, str(error) if isinstance(error, SyncError) else f"Sync failed: {error}"
+
+
+def sync_tastytrade_task(user_id, credential_id):
+    """run_sync() for the stored credential, outside the request"""
+    credential = TastyTradeCredential.objects.select_related('user').get(pk=credential_id, user_id=user_id)
+    run_sync(credential.user, credential)
+
+
+if shared_task is not None:
+    # API hiccups are retried with exponential backoff; SyncError is final
+    sync_tastytrade_task = shared_task(
+        autoretry_for=(requests.RequestException,), retry_backoff=True,
+    )(sync_tastytrade_task)
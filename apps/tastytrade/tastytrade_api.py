@@ -1,11 +1,84 @@
+import copy
 import requests
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import datetime, timedelta
+from functools import lru_cache
 from django.conf import settings
 import logging
 
+from .options_pricing import black_scholes_delta_theta_batch, option_greek_inputs
+
+try:
+    from redis import Redis
+    from requests_cache import DO_NOT_CACHE, CachedSession
+    from requests_cache.backends.redis import RedisCache
+except ImportError:  # requests-cache/redis are optional; fall back to an uncached session
+    CachedSession = None
+
 logger = logging.getLogger(__name__)
 
+# GET endpoints whose responses are cached per credential (near-immutable data)
+CACHED_URL_PATTERNS = ('*/customers/me/accounts',)
+
+
+def oauth_status_cache_key(user_id):
+    """Cache key of the oauth_status response of a user"""
+    return f"oauth_status:{user_id}"
+
+
+@lru_cache(maxsize=1024)
+def parse_api_date(value):
+    """Parse a TastyTrade ISO date (e.g. ``expiration-date``) to a date, or None.
+
+    Expiries repeat heavily across positions and transactions, so results
+    are memoised instead of re-parsed per row.
+    """
+    try:
+        return datetime.fromisoformat(value).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_api_datetime(value):
+    """Parse a TastyTrade ISO timestamp to an aware datetime, or None.
+
+    Date-only values are made aware in the current timezone.
+    """
+    try:
+        if 'T' in value:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return timezone.make_aware(datetime.fromisoformat(value), timezone.get_current_timezone())
+    except (TypeError, ValueError):
+        return None
+
+
+def build_session(credential):
+    """Return the HTTP session used for a credential's API calls.
+
+    With requests-cache and ``REDIS_URL`` configured, GETs matching
+    ``CACHED_URL_PATTERNS`` are served from Redis for
+    ``TASTYTRADE_API_CACHE_SECONDS``. Each credential gets its own cache
+    namespace, so responses are never shared between users. POSTs and all
+    other URLs always hit the network.
+    """
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if CachedSession is None or not redis_url or getattr(credential, 'pk', None) is None:
+        return requests.Session()
+
+    expire_after = getattr(settings, 'TASTYTRADE_API_CACHE_SECONDS', 60)
+    return CachedSession(
+        backend=RedisCache(
+            namespace=f'tastytrade_api:{credential.pk}',
+            connection=Redis.from_url(redis_url),
+        ),
+        expire_after=DO_NOT_CACHE,
+        urls_expire_after={pattern: expire_after for pattern in CACHED_URL_PATTERNS},
+        allowable_methods=('GET',),
+        cache_control=True,
+    )
+
+
 class TastyTradeAPI:
     PROD_BASE_URL = 'https://api.tastytrade.com'
     SANDBOX_BASE_URL = 'https://api.cert.tastyworks.com'
@@ -31,8 +104,8 @@ class TastyTradeAPI:
             self.base_url = self.SANDBOX_BASE_URL
         else:
             self.base_url = self.PROD_BASE_URL
-        print(f"DEBUG: Using API base URL: {self.base_url} (environment: {credential.environment})")
-        self.session = requests.Session()
+        logger.debug("Using API base URL: %s (environment: %s)", self.base_url, credential.environment)
+        self.session = build_session(credential)
         self.token = None
         self.access_token = None
         self.token_expires_at = None
@@ -73,6 +146,15 @@ class TastyTradeAPI:
             return False
         return timezone.now() < self.token_expires_at
     
+    def with_own_session(self):
+        """Copy of this client on a new session with the same headers
+        (authentication included), for calls made from another thread:
+        requests doesn't guarantee a Session is thread-safe"""
+        api = copy.copy(self)
+        api.session = build_session(self.credential)
+        api.session.headers.update(self.session.headers)
+        return api
+
     def _set_oauth_header(self):
         """Set OAuth Bearer token in session headers"""
         if "Authorization" in self.session.headers:
@@ -112,6 +194,7 @@ class TastyTradeAPI:
         self.token_expires_at = timezone.now() + timedelta(seconds=expires_in)
         
         self.credential.save()
+        cache.delete(oauth_status_cache_key(self.credential.user_id))
         self._set_oauth_header()
         
         logger.info("OAuth token refreshed successfully")
@@ -166,14 +249,14 @@ class TastyTradeAPI:
     def login(self):
         username = self.credential.username.strip()
         password = self.credential.password.strip()
-        print(f"DEBUG: Logging in with username='{username}' password='***' environment='{self.credential.environment}'")
-        print(f"DEBUG: Using URL: {self.base_url}/sessions")
+        logger.debug("Logging in with username='%s' password='***' environment='%s'", username, self.credential.environment)
+        logger.debug("Using URL: %s/sessions", self.base_url)
         url = f"{self.base_url}/sessions"
         resp = self.session.post(url, json={
             "login": username,
             "password": password,
         })
-        print(f"DEBUG: Response {resp.status_code} {resp.text}")
+        logger.debug("Login response %s", resp.status_code)
         if resp.status_code != 201:
             raise Exception(f"TastyTrade login failed: {resp.text}")
         data = resp.json()
@@ -184,9 +267,8 @@ class TastyTradeAPI:
         self.user_external_id = user_data.get("external-id")
         self.username = user_data.get("username")
         
-        print(f"DEBUG: Got token: {self.token[:20]}...")
-        print(f"DEBUG: User external ID: {self.user_external_id}")
-        print(f"DEBUG: Username: {self.username}")
+        logger.debug("User external ID: %s", self.user_external_id)
+        logger.debug("Username: %s", self.username)
         
         # Remove any old Authorization header before setting a new one
         if "Authorization" in self.session.headers:
@@ -201,25 +283,25 @@ class TastyTradeAPI:
         """Test if the current authentication (OAuth or session) is working"""
         # Try to get accounts as a way to test the session
         url = f"{self.base_url}/customers/me/accounts"
-        print(f"DEBUG: Testing {self.auth_method} auth with accounts endpoint {url}")
+        logger.debug("Testing %s auth with accounts endpoint %s", self.auth_method, url)
         resp = self.session.get(url)
-        print(f"DEBUG: Session test response {resp.status_code} {resp.text[:200]}...")
+        logger.debug("Session test response %s", resp.status_code)
         
         # If OAuth token expired, try to refresh
         if resp.status_code == 401 and self.auth_method == 'oauth':
-            print("DEBUG: OAuth token may have expired, attempting refresh")
+            logger.debug("OAuth token may have expired, attempting refresh")
             try:
                 self._refresh_access_token()
                 resp = self.session.get(url)
-                print(f"DEBUG: Session test after token refresh {resp.status_code} {resp.text[:200]}...")
+                logger.debug("Session test after token refresh %s", resp.status_code)
             except Exception as e:
-                print(f"DEBUG: Token refresh failed: {e}")
+                logger.debug("Token refresh failed: %s", e)
         
         return resp.status_code == 200
 
     def get_customer_id(self):
         """Get the customer ID - use 'me' as it works with TastyTrade API"""
-        print(f"DEBUG: Using 'me' as customer ID (TastyTrade convention)")
+        logger.debug("Using 'me' as customer ID (TastyTrade convention)")
         return "me"
 
     def fetch_accounts(self):
@@ -229,27 +311,25 @@ class TastyTradeAPI:
             
             # Then fetch accounts using the customer ID
             url = f"{self.base_url}/customers/{customer_id}/accounts"
-            print(f"DEBUG: Fetching accounts from {url}")
-            print(f"DEBUG: Headers being sent: {dict(self.session.headers)}")
+            logger.debug("Fetching accounts from %s", url)
             resp = self.session.get(url)
-            print(f"DEBUG: Accounts response {resp.status_code} {resp.text}")
+            logger.debug("Accounts response %s", resp.status_code)
             if resp.status_code == 200:
                 data = resp.json()
                 # Handle the new response format: data.items[].account
                 items = data.get("data", {}).get("items", [])
                 accounts = [item["account"]["account-number"] for item in items if "account" in item]
-                print(f"DEBUG: Found accounts: {accounts}")
+                logger.debug("Found accounts: %s", accounts)
                 return accounts
         except Exception as e:
-            print(f"DEBUG: Customer ID approach failed: {e}")
+            logger.debug("Customer ID approach failed: %s", e)
         
         # Fallback: try the original /accounts endpoint directly
-        print(f"DEBUG: Trying fallback /accounts endpoint")
+        logger.debug("Trying fallback /accounts endpoint")
         url = f"{self.base_url}/accounts"
-        print(f"DEBUG: Fetching accounts from {url}")
-        print(f"DEBUG: Headers being sent: {dict(self.session.headers)}")
+        logger.debug("Fetching accounts from %s", url)
         resp = self.session.get(url)
-        print(f"DEBUG: Accounts response {resp.status_code} {resp.text}")
+        logger.debug("Accounts response %s", resp.status_code)
         if resp.status_code == 200:
             data = resp.json()
             # Try both response formats
@@ -260,36 +340,49 @@ class TastyTradeAPI:
             else:
                 # Old format: data[]
                 accounts = [acct["account-number"] for acct in data.get("data", [])]
-            print(f"DEBUG: Found accounts: {accounts}")
+            logger.debug("Found accounts: %s", accounts)
             return accounts
         
         # If both approaches fail, raise the final error
         raise Exception(f"Failed to fetch accounts: Status {resp.status_code}, Response: {resp.text}")
 
-    def fetch_positions(self, account_number):
+    def _build_model(self, as_model, account_number, row):
+        """Build an unsaved ``as_model`` instance for ``account_number`` from a parsed row.
+
+        Keys that are not fields on the model (e.g. ``multiplier``) are dropped,
+        and values are coerced with each field's ``to_python()`` so the API's
+        decimal strings and floats compare equal to what the database returns.
+        """
+        fields = {field.name: field for field in as_model._meta.concrete_fields}
+        return as_model(
+            user_id=self.credential.user_id,
+            credential=self.credential,
+            tastytrade_account_number=account_number,
+            **{key: fields[key].to_python(value) for key, value in row.items() if key in fields},
+        )
+
+    def fetch_positions(self, account_number, as_model=None):
+        """Fetch positions for an account.
+
+        Returns a list of dicts, or unsaved ``as_model`` instances when given,
+        ready for ``bulk_create``.
+        """
         url = f"{self.base_url}/accounts/{account_number}/positions"
-        print(f"DEBUG: Fetching positions from {url}")
-        print(f"DEBUG: Headers being sent: {dict(self.session.headers)}")
+        logger.debug("Fetching positions from %s", url)
         resp = self.session.get(url)
-        print(f"DEBUG: Positions response {resp.status_code} {resp.text}")
+        logger.debug("Positions response %s", resp.status_code)
         if resp.status_code != 200:
             raise Exception(f"Failed to fetch positions: Status {resp.status_code}, Response: {resp.text}")
         data = resp.json()
         positions = []
+        option_rows = []
+        option_inputs = []
         # Handle the new response format: data.items[]
         items = data.get("data", {}).get("items", [])
-        print(f"DEBUG: Retrieved {len(items)} positions")
+        logger.debug("Retrieved %s positions", len(items))
         for pos in items:
-            print(f"DEBUG: Raw position data: {pos}")
             
-            # Parse expiry date if it's a string
-            expiry = pos.get("expiration-date")
-            if isinstance(expiry, str):
-                try:
-                    from datetime import datetime
-                    expiry = datetime.fromisoformat(expiry).date()
-                except (ValueError, AttributeError):
-                    expiry = None
+            expiry = parse_api_date(pos.get("expiration-date"))
             
             # Calculate market value and unrealized P&L from available fields
             quantity = pos.get("quantity", 0)
@@ -300,38 +393,30 @@ class TastyTradeAPI:
             market_value = quantity * close_price * multiplier if close_price else None
             unrealized_pnl = (close_price - average_open_price) * quantity * multiplier if close_price and average_open_price else None
             
-            # Calculate Greeks using Black-Scholes model
+            # Greeks: equities are fixed, options are priced in one batch below
             delta = None
             theta = None
             instrument_type = pos.get("instrument-type")
-            print(f"DEBUG: Position {pos.get('symbol')} - instrument-type: {instrument_type}, put-call: {pos.get('put-call')}, strike: {pos.get('strike-price')}")
+            logger.debug("Position %s - instrument-type: %s, put-call: %s, strike: %s", pos.get('symbol'), instrument_type, pos.get('put-call'), pos.get('strike-price'))
             
             if instrument_type and "option" in instrument_type.lower():
-                from .options_pricing import calculate_option_greeks
-                print(f"DEBUG: Calculating Greeks for option {pos.get('symbol')}")
-                delta, theta = calculate_option_greeks(
+                greek_inputs = option_greek_inputs(
                     symbol=pos.get("symbol", ""),
                     current_price=close_price,
                     strike_price=pos.get("strike-price"),
                     expiry_date=expiry,
                     option_type=pos.get("put-call")
                 )
-                print(f"DEBUG: Calculated Greeks - Delta: {delta}, Theta: {theta}")
+                if greek_inputs is not None:
+                    option_rows.append(len(positions))
+                    option_inputs.append(greek_inputs)
             elif instrument_type and instrument_type.lower() == "equity":
                 # Stocks have delta of 0, theta of 0
-                print(f"DEBUG: Setting equity Greeks for {pos.get('symbol')}")
+                logger.debug("Setting equity Greeks for %s", pos.get('symbol'))
                 delta = 0.0
                 theta = 0.0
             else:
-                print(f"DEBUG: No Greeks calculated for {pos.get('symbol')} - instrument type: {instrument_type}")
-            
-            # Scale Greeks by position size for portfolio calculations
-            if delta is not None:
-                delta = delta * quantity * multiplier
-            if theta is not None:
-                theta = theta * quantity * multiplier
-            
-            print(f"DEBUG: Final Greeks for {pos.get('symbol')} - Delta: {delta}, Theta: {theta} (scaled by quantity {quantity})")
+                logger.debug("No Greeks calculated for %s - instrument type: %s", pos.get('symbol'), instrument_type)
             
             positions.append({
                 "asset_type": pos.get("instrument-type", "other"),
@@ -351,10 +436,31 @@ class TastyTradeAPI:
                 "option_type": pos.get("put-call"),
                 "multiplier": multiplier,  # Include multiplier for daily P&L calculation
             })
+        
+        # Price every option in a single Black-Scholes kernel call
+        for row, (delta, theta) in zip(option_rows, black_scholes_delta_theta_batch(option_inputs)):
+            positions[row]["delta"] = delta
+            positions[row]["theta"] = theta
+            logger.debug("Calculated Greeks for %s - Delta: %s, Theta: %s", positions[row]['symbol'], delta, theta)
+        
+        # Scale Greeks by position size for portfolio calculations
+        for position in positions:
+            if position["delta"] is not None:
+                position["delta"] = position["delta"] * position["quantity"] * position["multiplier"]
+            if position["theta"] is not None:
+                position["theta"] = position["theta"] * position["quantity"] * position["multiplier"]
+        
+        if as_model is not None:
+            return [self._build_model(as_model, account_number, pos) for pos in positions]
         return positions
 
 
-    def fetch_transactions(self, account_number, start_date=None):
+    def fetch_transactions(self, account_number, start_date=None, as_model=None):
+        """Fetch transactions for an account, optionally from ``start_date`` onwards.
+
+        Returns a list of dicts, or unsaved ``as_model`` instances when given,
+        ready for ``bulk_create``.
+        """
         url = f"{self.base_url}/accounts/{account_number}/transactions"
         
         # Add date filtering if start_date is provided
@@ -366,57 +472,23 @@ class TastyTradeAPI:
             else:
                 start_date_str = start_date
             params['start-date'] = start_date_str
-            print(f"DEBUG: Fetching transactions from {start_date_str} onwards")
+            logger.debug("Fetching transactions from %s onwards", start_date_str)
         
-        print(f"DEBUG: Fetching transactions from {url}")
-        print(f"DEBUG: Query params: {params}")
-        print(f"DEBUG: Headers being sent: {dict(self.session.headers)}")
+        logger.debug("Fetching transactions from %s", url)
+        logger.debug("Query params: %s", params)
         
         resp = self.session.get(url, params=params)
-        print(f"DEBUG: Transactions response {resp.status_code}")
+        logger.debug("Transactions response %s", resp.status_code)
         if resp.status_code != 200:
             raise Exception(f"Failed to fetch transactions: Status {resp.status_code}, Response: {resp.text}")
         data = resp.json()
         transactions = []
         # Handle the new response format: data.items[]
         items = data.get("data", {}).get("items", [])
-        print(f"DEBUG: Retrieved {len(items)} transactions")
+        logger.debug("Retrieved %s transactions", len(items))
         for txn in items:
-            # Debug: Print first transaction to see available fields
-            if len(transactions) == 0:
-                print(f"DEBUG: First transaction fields: {list(txn.keys())}")
-                print(f"DEBUG: Transaction date value: {txn.get('transaction-date')}")
-                # Check for other potential time fields
-                potential_time_fields = ['time', 'executed-at', 'trade-time', 'timestamp', 'created-at', 'executed-time']
-                for field in potential_time_fields:
-                    if field in txn:
-                        print(f"DEBUG: Found time field '{field}': {txn.get(field)}")
-            
-            # Parse transaction date if it's a string
-            trade_date = txn.get("transaction-date")
-            if isinstance(trade_date, str):
-                try:
-                    from datetime import datetime
-                    from django.utils import timezone
-                    # Parse the date and make it timezone aware
-                    if 'T' in trade_date:
-                        # Full datetime
-                        trade_date = datetime.fromisoformat(trade_date.replace('Z', '+00:00'))
-                    else:
-                        # Date only - parse and make timezone aware
-                        trade_date = datetime.fromisoformat(trade_date)
-                        trade_date = timezone.make_aware(trade_date, timezone.get_current_timezone())
-                except (ValueError, AttributeError):
-                    trade_date = None
-            
-            # Parse expiry date if it's a string
-            expiry = txn.get("expiration-date")
-            if isinstance(expiry, str):
-                try:
-                    from datetime import datetime
-                    expiry = datetime.fromisoformat(expiry).date()
-                except (ValueError, AttributeError):
-                    expiry = None
+            trade_date = parse_api_datetime(txn.get("transaction-date"))
+            expiry = parse_api_date(txn.get("expiration-date"))
             
             transactions.append({
                 "transaction_id": txn.get("id"),  # Fixed: was "transaction-id"
@@ -432,4 +504,6 @@ class TastyTradeAPI:
                 "strike": txn.get("strike-price"),
                 "option_type": txn.get("put-call"),
             })
+        if as_model is not None:
+            return [self._build_model(as_model, account_number, txn) for txn in transactions]
         return transactions 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Shared pytest fixtures for the TastyTrade tests
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from apps.tastytrade.models import TastyTradeCredential
+from apps.tastytrade.tastytrade_api import TastyTradeAPI
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """Start every test (TestCase ones included) with an empty cache"""
+    cache.clear()
+
+
+def _in_memory_credential(environment='prod', username='produser', password='prodpass'):
+    """Stand-in for a TastyTradeCredential (no database row)"""
+    return SimpleNamespace(
+        environment=environment,
+        username=username,
+        password=password,
+        access_token=None,
+        refresh_token=None,
+    )
+
+
+@pytest.fixture
+def credential_factory():
+    """Build in-memory credentials: credential_factory(environment, username, password)"""
+    return _in_memory_credential
+
+
+@pytest.fixture
+def sandbox_credential():
+    """In-memory sandbox credential"""
+    return _in_memory_credential('sandbox', 'sandboxuser', 'sandboxpass')
+
+
+@pytest.fixture
+def api_factory(credential_factory):
+    """Build API clients, from a given credential or an in-memory one built from kwargs"""
+    def build(credential=None, **kwargs):
+        return TastyTradeAPI(credential if credential is not None else credential_factory(**kwargs))
+    return build
+
+
+@pytest.fixture(scope='module')
+def prod_credential(django_db_setup, django_db_blocker):
+    """Saved production credential shared by the module (setUpTestData equivalent)"""
+    with django_db_blocker.unblock():
+        # Unusable password: no password hasher run
+        user = User(username='api_client_user', email='test@example.com')
+        user.set_unusable_password()
+        user.save()
+        credential = TastyTradeCredential.objects.create(
+            user=user,
+            environment='prod',
+            username='produser',
+            password='prodpass'
+        )
+    yield credential
+    with django_db_blocker.unblock():
+        user.delete()
+
+
+@pytest.fixture
+def view_user(db):
+    """User for the view tests (no password: authed_client uses force_login)"""
+    return User.objects.create(username='testuser', email='test@example.com')
+
+
+@pytest.fixture
+def authed_client(client, view_user):
+    """pytest-django test client logged in as view_user"""
+    client.force_login(view_user)
+    return client
@@ -4,457 +4,522 @@ Mocks external API calls to ensure reliable testing
 """
 
 import json
-from unittest.mock import Mock, patch, MagicMock
-from django.test import TestCase
-from django.contrib.auth import get_user_model
-from datetime import datetime, date
-from requests.exceptions import RequestException, HTTPError
+from datetime import datetime, date, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock
 
-from apps.tastytrade.models import TastyTradeCredential
+import pytest
+from requests.exceptions import RequestException
+
+from apps.tastytrade.models import Transaction
+from apps.tastytrade import tastytrade_api
 from apps.tastytrade.tastytrade_api import TastyTradeAPI
+from apps.tastytrade.tests.test_fixtures import freeze_json
 
-User = get_user_model()
-
-
-class TastyTradeAPITests(TestCase):
-    """Test TastyTrade API client functionality"""
-
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        
-        # Create production credential
-        self.prod_credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='produser',
-            password='prodpass'
-        )
-        
-        # Create sandbox credential
-        self.sandbox_credential = TastyTradeCredential.objects.create(
-            user=User.objects.create_user('sandbox_user', 'sandbox@test.com', 'pass'),
-            environment='sandbox',
-            username='sandboxuser',
-            password='sandboxpass'
-        )
-
-    def test_api_initialization_production(self):
-        """Test API client initialization for production"""
-        api = TastyTradeAPI(self.prod_credential)
-        
-        self.assertEqual(api.base_url, 'https://api.tastytrade.com')
-        self.assertEqual(api.credential, self.prod_credential)
-        self.assertIsNone(api.token)
-        self.assertEqual(api.session.headers['User-Agent'], 'tastytrade-tracker/1.0')
-
-    def test_api_initialization_sandbox(self):
-        """Test API client initialization for sandbox"""
-        api = TastyTradeAPI(self.sandbox_credential)
-        
-        self.assertEqual(api.base_url, 'https://api.cert.tastyworks.com')
-        self.assertEqual(api.credential, self.sandbox_credential)
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    def test_successful_login(self, mock_post):
-        """Test successful login flow"""
-        # Mock successful login response
-        mock_response = Mock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {
-            "data": {
-                "session-token": "test-session-token-123",
-                "user": {
-                    "username": "testuser",
-                    "email": "test@example.com"
-                }
-            }
-        }
-        mock_post.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.login()
-        
-        # Verify login was called correctly
-        mock_post.assert_called_once_with(
-            'https://api.tastytrade.com/sessions',
-            json={'login': 'produser', 'password': 'prodpass'}
-        )
-        
-        # Verify token was stored and headers updated
-        self.assertEqual(api.token, 'test-session-token-123')
-        self.assertEqual(api.session.headers['Authorization'], 'test-session-token-123')
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    def test_login_failure_invalid_credentials(self, mock_post):
-        """Test login failure with invalid credentials"""
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_response.text = '{"error":{"code":"invalid_credentials","message":"Invalid login"}}'
-        mock_post.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        
-        with self.assertRaises(Exception) as context:
-            api.login()
-        
-        self.assertIn('TastyTrade login failed', str(context.exception))
-        self.assertIn('invalid_credentials', str(context.exception))
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    def test_login_handles_whitespace_in_credentials(self, mock_post):
-        """Test that login strips whitespace from credentials"""
-        # Create credential with whitespace
-        credential = TastyTradeCredential.objects.create(
-            user=User.objects.create_user('whitespace_user', 'ws@test.com', 'pass'),
-            environment='prod',
-            username='  spaced_user  ',
-            password='  spaced_pass  '
-        )
-        
-        mock_response = Mock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {
-            "data": {"session-token": "test-token"}
-        }
-        mock_post.return_value = mock_response
-        
-        api = TastyTradeAPI(credential)
-        api.login()
-        
-        # Verify credentials were stripped
-        mock_post.assert_called_once_with(
-            'https://api.tastytrade.com/sessions',
-            json={'login': 'spaced_user', 'password': 'spaced_pass'}
-        )
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_accounts_success(self, mock_get):
-        """Test successful account fetching"""
-        # Mock customer info response
-        customer_response = Mock()
-        customer_response.status_code = 200
-        customer_response.json.return_value = {
-            "data": {"id": "customer-123"}
-        }
-        
-        # Mock accounts response
-        accounts_response = Mock()
-        accounts_response.status_code = 200
-        accounts_response.json.return_value = {
-            "data": [
-                {"account-number": "123456789"},
-                {"account-number": "987654321"}
-            ]
+class FakeResp:
+    """Minimal stand-in for requests.Response: status_code, text and json()"""
+    __slots__ = ('status_code', '_json', 'text')
+
+    def json(self):
+        return self._json
+
+
+def resp(status, body=None, text=''):
+    """Build a FakeResp with the given status, JSON body and raw text"""
+    r = FakeResp()
+    r.status_code = status
+    r._json = body
+    r.text = text
+    return r
+
+
+# Canonical API payloads, built once at import and read-only so tests can't
+# leak mutations into each other
+_OK_LOGIN = freeze_json({
+    "data": {
+        "session-token": "test-session-token-123",
+        "user": {
+            "username": "testuser",
+            "email": "test@example.com"
         }
-        
-        mock_get.side_effect = [customer_response, accounts_response]
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"  # Simulate logged in state
-        
-        accounts = api.fetch_accounts()
-        
-        self.assertEqual(accounts, ["123456789", "987654321"])
-        # Verify both calls were made
-        expected_calls = [
-            (('https://api.tastytrade.com/me',), {}),
-            (('https://api.tastytrade.com/customers/customer-123/accounts',), {})
+    }
+})
+
+_EMPTY_ITEMS_JSON = freeze_json({"data": {"items": []}})
+
+_ACCOUNTS_JSON = freeze_json({
+    "data": {
+        "items": [
+            {"account": {"account-number": "123456789"}},
+            {"account": {"account-number": "987654321"}}
         ]
-        self.assertEqual(mock_get.call_args_list, expected_calls)
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_accounts_empty_response(self, mock_get):
-        """Test account fetching with empty response"""
-        # Mock customer info response
-        customer_response = Mock()
-        customer_response.status_code = 200
-        customer_response.json.return_value = {
-            "data": {"id": "customer-123"}
-        }
-        
-        # Mock empty accounts response
-        accounts_response = Mock()
-        accounts_response.status_code = 200
-        accounts_response.json.return_value = {"data": []}
-        
-        mock_get.side_effect = [customer_response, accounts_response]
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        accounts = api.fetch_accounts()
-        
-        self.assertEqual(accounts, [])
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_accounts_not_permitted(self, mock_get):
-        """Test account fetching with 403 not permitted error"""
-        # Mock customer info failure
-        customer_response = Mock()
-        customer_response.status_code = 403
-        customer_response.text = '{"error":{"code":"not_permitted","message":"User not permitted access"}}'
-        mock_get.return_value = customer_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        with self.assertRaises(Exception) as context:
-            api.fetch_accounts()
-        
-        self.assertIn('Failed to get customer info', str(context.exception))
-        self.assertIn('403', str(context.exception))
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_positions_success(self, mock_get):
-        """Test successful position fetching"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "data": [
-                {
-                    "instrument-type": "stock",
-                    "symbol": "AAPL",
-                    "description": "Apple Inc.",
-                    "quantity": 100,
-                    "average-price": 150.25,
-                    "market-value": 15025.00,
-                    "unrealized-pnl": 500.00,
-                    "delta": 1.0
-                },
-                {
-                    "instrument-type": "option",
-                    "symbol": "AAPL",
-                    "description": "AAPL Call",
-                    "quantity": 10,
-                    "average-price": 5.25,
-                    "expiration-date": "2024-12-20",
-                    "strike-price": 150.00,
-                    "put-call": "call"
-                }
-            ]
-        }
-        mock_get.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        positions = api.fetch_positions("123456789")
-        
-        self.assertEqual(len(positions), 2)
-        
-        # Check stock position
-        stock_pos = positions[0]
-        self.assertEqual(stock_pos['asset_type'], 'stock')
-        self.assertEqual(stock_pos['symbol'], 'AAPL')
-        self.assertEqual(stock_pos['quantity'], 100)
-        
-        # Check option position
-        option_pos = positions[1]
-        self.assertEqual(option_pos['asset_type'], 'option')
-        self.assertEqual(option_pos['expiry'], date(2024, 12, 20))
-        self.assertEqual(option_pos['strike'], 150.00)
-        self.assertEqual(option_pos['option_type'], 'call')
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_transactions_success(self, mock_get):
-        """Test successful transaction fetching"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "data": [
-                {
-                    "transaction-id": "TXN123",
-                    "type": "trade",
-                    "symbol": "AAPL",
-                    "description": "Buy 100 AAPL",
-                    "quantity": 100,
-                    "price": 150.25,
-                    "amount": 15025.00,
-                    "transaction-date": "2024-05-29T14:30:00Z",
-                    "instrument-type": "stock"
-                }
-            ]
-        }
-        mock_get.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        transactions = api.fetch_transactions("123456789")
-        
-        self.assertEqual(len(transactions), 1)
-        
-        txn = transactions[0]
-        self.assertEqual(txn['transaction_id'], 'TXN123')
-        self.assertEqual(txn['transaction_type'], 'trade')
-        self.assertEqual(txn['symbol'], 'AAPL')
-        self.assertEqual(txn['amount'], 15025.00)
-        
-        # Check date parsing
-        expected_date = datetime(2024, 5, 29, 14, 30, 0, tzinfo=datetime.now().astimezone().tzinfo)
-        self.assertIsInstance(txn['trade_date'], datetime)
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_fetch_transactions_date_parsing_error(self, mock_get):
-        """Test transaction fetching with invalid date format"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "data": [
-                {
-                    "transaction-id": "TXN123",
-                    "type": "trade",
-                    "amount": 1000.00,
-                    "transaction-date": "invalid-date-format",
-                }
-            ]
-        }
-        mock_get.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        transactions = api.fetch_transactions("123456789")
-        
+    }
+})
+
+_POSITIONS_RAW = {
+    "data": {
+        "items": [
+            {
+                "instrument-type": "stock",
+                "symbol": "AAPL",
+                "description": "Apple Inc.",
+                "quantity": 100,
+                "average-price": 150.25,
+                "market-value": 15025.00,
+                "unrealized-pnl": 500.00,
+                "delta": 1.0
+            },
+            {
+                "instrument-type": "option",
+                "symbol": "AAPL",
+                "description": "AAPL Call",
+                "quantity": 10,
+                "average-price": 5.25,
+                "expiration-date": "2024-12-20",
+                "strike-price": 150.00,
+                "put-call": "call"
+            }
+        ]
+    }
+}
+_POSITIONS_JSON = freeze_json(_POSITIONS_RAW)
+_POSITIONS_TEXT = json.dumps(_POSITIONS_RAW)
+
+# fetch_positions() output for _POSITIONS_JSON: neither row carries a close
+# price, so no P&L is derived and the option can't be priced
+EXPECTED_STOCK_POS = {
+    "asset_type": "stock",
+    "symbol": "AAPL",
+    "description": "",
+    "quantity": 100,
+    "average_price": None,
+    "current_price": None,
+    "market_value": None,
+    "unrealized_pnl": None,
+    "realized_pnl": 0,
+    "delta": None,
+    "theta": None,
+    "beta": None,
+    "expiry": None,
+    "strike": None,
+    "option_type": None,
+    "multiplier": 1,
+}
+EXPECTED_OPTION_POS = {
+    **EXPECTED_STOCK_POS,
+    "asset_type": "option",
+    "quantity": 10,
+    "expiry": date(2024, 12, 20),
+    "strike": 150.00,
+    "option_type": "call",
+}
+
+_TRANSACTIONS_JSON = freeze_json({
+    "data": {
+        "items": [
+            {
+                "id": "TXN123",
+                "transaction-type": "trade",
+                "symbol": "AAPL",
+                "description": "Buy 100 AAPL",
+                "quantity": 100,
+                "price": 150.25,
+                "net-value": 15025.00,
+                "transaction-date": "2024-05-29T14:30:00Z",
+                "instrument-type": "stock"
+            }
+        ]
+    }
+})
+
+_MODEL_TRANSACTIONS_JSON = freeze_json({
+    "data": {
+        "items": [
+            {
+                "id": "TXN123",
+                "transaction-type": "Trade",
+                "symbol": "AAPL",
+                "net-value": "-15025.00",
+                "transaction-date": "2024-05-29T14:30:00Z",
+                "instrument-type": "Equity"
+            }
+        ]
+    }
+})
+
+
+class FakeTransport:
+    """Stand-in for Session.post/get: records (url, kwargs) calls and returns ``response``"""
+
+    def __init__(self):
+        self.calls = []
+        self.response = None
+
+    def __call__(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.response
+
+    def reset(self):
+        self.calls.clear()
+        self.response = None
+
+
+class FakeSession:
+    """Stand-in for requests.Session: a plain headers dict and recording post/get"""
+
+    def __init__(self):
+        self.headers = {}
+        self.post = FakeTransport()
+        self.get = FakeTransport()
+
+
+@pytest.fixture(scope='module', autouse=True)
+def fake_requests():
+    """Swap the API module's ``requests`` for a stub so no test builds a real Session"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(tastytrade_api, 'requests', SimpleNamespace(Session=FakeSession))
+        yield
+
+
+@pytest.fixture(scope='module')
+def api_transport(prod_credential):
+    """One API client on a FakeSession, shared by the whole module"""
+    api = TastyTradeAPI(prod_credential)
+    return api, api.session.post, api.session.get
+
+
+@pytest.fixture
+def api_env(api_transport):
+    """The shared (api, fake_post, fake_get) triple, logged out with recorded calls cleared"""
+    api, fake_post, fake_get = api_transport
+    api.token = None
+    api.session.headers.pop('Authorization', None)
+    fake_post.reset()
+    fake_get.reset()
+    return api, fake_post, fake_get
+
+
+# API client construction - no database access. Like SimpleTestCase with
+# databases = set(), these run outside any transaction and pytest-django
+# fails them if they query the ORM (no django_db mark, no saved credential)
+
+def test_api_initialization_production(credential_factory, api_factory):
+    """Test API client initialization for production"""
+    credential = credential_factory()
+    api = api_factory(credential)
+
+    assert api.base_url == 'https://api.tastytrade.com'
+    assert api.credential == credential
+    assert api.token is None
+    assert api.session.headers['User-Agent'] == 'tastytrade-tracker/1.0'
+
+
+def test_api_initialization_sandbox(sandbox_credential, api_factory):
+    """Test API client initialization for sandbox"""
+    api = api_factory(sandbox_credential)
+
+    assert api.base_url == 'https://api.cert.tastyworks.com'
+    assert api.credential == sandbox_credential
+
+
+def test_header_initialization(api_factory):
+    """Test that headers are properly initialized"""
+    api = api_factory()
+
+    headers = api.session.headers
+    assert headers['User-Agent'] == 'tastytrade-tracker/1.0'
+    assert headers['Content-Type'] == 'application/json'
+    assert headers['Accept'] == 'application/json'
+    assert 'Authorization' not in headers  # Should be empty before login
+
+
+def test_session_uncached_without_redis(settings, api_factory):
+    """Test that a plain requests session is used when no Redis cache is configured"""
+    settings.REDIS_URL = None
+    api = api_factory()
+
+    assert type(api.session) is FakeSession
+
+
+# API calls against the shared, saved credential
+
+def test_successful_login(api_env):
+    """Test successful login flow"""
+    api, fake_post, _ = api_env
+    fake_post.response = resp(201, _OK_LOGIN)
+
+    api.login()
+
+    # Verify login was called correctly
+    assert fake_post.calls == [
+        ('https://api.tastytrade.com/sessions', {'json': {'login': 'produser', 'password': 'prodpass'}}),
+    ]
+
+    # Verify token was stored and headers updated
+    assert api.token == 'test-session-token-123'
+    assert api.session.headers['Authorization'] == 'test-session-token-123'
+
+
+def test_login_failure_invalid_credentials(api_env):
+    """Test login failure with invalid credentials"""
+    api, fake_post, _ = api_env
+    fake_post.response = resp(
+        401, text='{"error":{"code":"invalid_credentials","message":"Invalid login"}}'
+    )
+
+    with pytest.raises(Exception) as excinfo:
+        api.login()
+
+    assert 'TastyTrade login failed' in str(excinfo.value)
+    assert 'invalid_credentials' in str(excinfo.value)
+
+
+def test_login_handles_whitespace_in_credentials(api_factory):
+    """Test that login strips whitespace from credentials"""
+    # Credential with whitespace around login and password
+    api = api_factory(username='  spaced_user  ', password='  spaced_pass  ')
+    api.session.post.response = resp(201, {"data": {"session-token": "test-token"}})
+
+    api.login()
+
+    # Verify credentials were stripped
+    assert api.session.post.calls == [
+        ('https://api.tastytrade.com/sessions', {'json': {'login': 'spaced_user', 'password': 'spaced_pass'}}),
+    ]
+
+
+def test_fetch_accounts_success(api_env):
+    """Test successful account fetching"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(200, _ACCOUNTS_JSON)
+    api.token = "test-token"  # Simulate logged in state
+
+    accounts = api.fetch_accounts()
+
+    assert accounts == ["123456789", "987654321"]
+    assert [url for url, _ in fake_get.calls] == [
+        'https://api.tastytrade.com/customers/me/accounts',
+    ]
+
+
+@pytest.mark.parametrize('status,body,method,args,url,expected', [
+    pytest.param(
+        200, _EMPTY_ITEMS_JSON,
+        'fetch_accounts', (),
+        'https://api.tastytrade.com/customers/me/accounts',
+        [],
+        id='fetch_accounts_empty_response',
+    ),
+    pytest.param(
+        200,
+        {
+            "data": {
+                "items": [
+                    {
+                        "id": "TXN123",
+                        "transaction-type": "trade",
+                        "net-value": 1000.00,
+                        "transaction-date": "invalid-date-format",
+                    }
+                ]
+            }
+        },
+        'fetch_transactions', ("123456789",),
+        'https://api.tastytrade.com/accounts/123456789/transactions',
         # Should handle invalid date gracefully
-        self.assertEqual(len(transactions), 1)
-        self.assertIsNone(transactions[0]['trade_date'])
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_test_session_success(self, mock_get):
-        """Test successful session validation"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "data": {"username": "testuser"}
-        }
-        mock_get.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "test-token"
-        
-        result = api.test_session()
-        
-        self.assertTrue(result)
-        mock_get.assert_called_once_with('https://api.tastytrade.com/me')
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
-    def test_test_session_failure(self, mock_get):
-        """Test session validation failure"""
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_get.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        api.token = "invalid-token"
-        
-        result = api.test_session()
-        
-        self.assertFalse(result)
-
-    def test_header_initialization(self):
-        """Test that headers are properly initialized"""
-        api = TastyTradeAPI(self.prod_credential)
-        
-        headers = api.session.headers
-        self.assertEqual(headers['User-Agent'], 'tastytrade-tracker/1.0')
-        self.assertEqual(headers['Content-Type'], 'application/json')
-        self.assertEqual(headers['Accept'], 'application/json')
-        self.assertNotIn('Authorization', headers)  # Should be empty before login
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    def test_authorization_header_update(self, mock_post):
-        """Test that authorization header is properly updated after login"""
-        mock_response = Mock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {
-            "data": {"session-token": "new-token-123"}
-        }
-        mock_post.return_value = mock_response
-        
-        api = TastyTradeAPI(self.prod_credential)
-        
-        # Set an old authorization header
-        api.session.headers['Authorization'] = 'old-token'
-        
+        [{
+            "transaction_id": "TXN123",
+            "transaction_type": "trade",
+            "symbol": "",
+            "description": "",
+            "quantity": None,
+            "price": None,
+            "amount": 1000.00,
+            "trade_date": None,
+            "asset_type": "",
+            "expiry": None,
+            "strike": None,
+            "option_type": None,
+        }],
+        id='fetch_transactions_date_parsing_error',
+    ),
+    pytest.param(
+        200, _EMPTY_ITEMS_JSON,
+        'test_session', (),
+        'https://api.tastytrade.com/customers/me/accounts',
+        True,
+        id='test_session_success',
+    ),
+    pytest.param(
+        401, None,
+        'test_session', (),
+        'https://api.tastytrade.com/customers/me/accounts',
+        False,
+        id='test_session_failure',
+    ),
+])
+def test_api_call(api_env, status, body, method, args, url, expected):
+    """Test that a stubbed GET response is parsed into the expected return value"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(status, body)
+    api.token = "test-token"
+
+    result = getattr(api, method)(*args)
+
+    assert result == expected
+    assert [called_url for called_url, _ in fake_get.calls] == [url]
+
+
+def test_fetch_accounts_not_permitted(api_env):
+    """Test account fetching with 403 not permitted error"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(
+        403, text='{"error":{"code":"not_permitted","message":"User not permitted access"}}'
+    )
+    api.token = "test-token"
+
+    with pytest.raises(Exception) as excinfo:
+        api.fetch_accounts()
+
+    assert 'Failed to fetch accounts' in str(excinfo.value)
+    assert '403' in str(excinfo.value)
+
+
+def test_fetch_positions_success(api_env):
+    """Test successful position fetching"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(200, _POSITIONS_JSON, text=_POSITIONS_TEXT)
+    api.token = "test-token"
+
+    positions = api.fetch_positions("123456789")
+
+    assert positions == [EXPECTED_STOCK_POS, EXPECTED_OPTION_POS]
+
+
+def test_fetch_transactions_success(api_env):
+    """Test successful transaction fetching"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(200, _TRANSACTIONS_JSON)
+    api.token = "test-token"
+
+    transactions = api.fetch_transactions("123456789")
+
+    assert len(transactions) == 1
+
+    txn = transactions[0]
+    assert txn['transaction_id'] == 'TXN123'
+    assert txn['transaction_type'] == 'trade'
+    assert txn['symbol'] == 'AAPL'
+    assert txn['amount'] == 15025.00
+
+    # Check date parsing
+    assert txn['trade_date'] == datetime(2024, 5, 29, 14, 30, tzinfo=timezone.utc)
+
+
+def test_fetch_transactions_as_model(api_env, prod_credential):
+    """Test that fetch_transactions can build unsaved model instances for bulk_create"""
+    api, _, fake_get = api_env
+    fake_get.response = resp(200, _MODEL_TRANSACTIONS_JSON)
+
+    transactions = api.fetch_transactions("123456789", as_model=Transaction)
+
+    assert len(transactions) == 1
+    txn = transactions[0]
+    assert isinstance(txn, Transaction)
+    assert txn.pk is None
+    assert txn.transaction_id == 'TXN123'
+    assert txn.user_id == prod_credential.user_id
+    assert txn.credential == prod_credential
+    assert txn.tastytrade_account_number == '123456789'
+
+
+def test_authorization_header_update(api_env):
+    """Test that authorization header is properly updated after login"""
+    api, fake_post, _ = api_env
+    fake_post.response = resp(201, {"data": {"session-token": "new-token-123"}})
+
+    # Set an old authorization header
+    api.session.headers['Authorization'] = 'old-token'
+
+    api.login()
+
+    # Should have updated to new token
+    assert api.session.headers['Authorization'] == 'new-token-123'
+
+
+def test_with_own_session_keeps_authentication(credential_factory, api_factory):
+    """Test that a client copied for another thread gets its own session, same headers"""
+    api = api_factory(credential_factory())
+    api.session.headers['Authorization'] = 'session-token'
+
+    worker_api = api.with_own_session()
+
+    assert worker_api.session is not api.session
+    assert worker_api.session.headers == api.session.headers
+    assert worker_api.credential is api.credential
+    assert worker_api.base_url == api.base_url
+
+    worker_api.session.headers['Authorization'] = 'other-token'
+    assert api.session.headers['Authorization'] == 'session-token'
+
+
+def test_network_error_handling(prod_credential, api_factory):
+    """Test handling of network errors"""
+    api = api_factory(prod_credential)
+    api.session = Mock()
+    api.session.post.side_effect = RequestException("Network error")
+
+    with pytest.raises(RequestException):
         api.login()
-        
-        # Should have updated to new token
-        self.assertEqual(api.session.headers['Authorization'], 'new-token-123')
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session')
-    def test_network_error_handling(self, mock_session):
-        """Test handling of network errors"""
-        mock_session_instance = Mock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.post.side_effect = RequestException("Network error")
-        
-        api = TastyTradeAPI(self.prod_credential)
-        
-        with self.assertRaises(RequestException):
-            api.login()
-
-
-class APIDataParsingTests(TestCase):
-    """Test API response data parsing and validation"""
-
-    def setUp(self):
-        self.user = User.objects.create_user('testuser', 'test@test.com', 'pass')
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='testuser',
-            password='testpass'
-        )
-
-    def test_position_data_extraction(self):
-        """Test that position data is correctly extracted from API response"""
-        api = TastyTradeAPI(self.credential)
-        
-        # Test with minimal data
-        raw_data = {
-            "symbol": "TEST",
-            "instrument-type": "stock",
-            "quantity": 100
-        }
-        
-        # This would be part of the fetch_positions logic
-        position_data = {
-            "asset_type": raw_data.get("instrument-type", "other"),
-            "symbol": raw_data.get("symbol"),
-            "quantity": raw_data.get("quantity", 0),
-            "description": raw_data.get("description", ""),
-        }
-        
-        self.assertEqual(position_data['asset_type'], 'stock')
-        self.assertEqual(position_data['symbol'], 'TEST')
-        self.assertEqual(position_data['quantity'], 100)
-        self.assertEqual(position_data['description'], '')
-
-    def test_transaction_data_extraction(self):
-        """Test that transaction data is correctly extracted from API response"""
-        api = TastyTradeAPI(self.credential)
-        
-        raw_data = {
-            "transaction-id": "TXN123",
-            "type": "trade",
-            "symbol": "AAPL",
-            "amount": 1000.50,
-            "transaction-date": "2024-05-29T14:30:00Z"
-        }
-        
-        # This would be part of the fetch_transactions logic
-        transaction_data = {
-            "transaction_id": raw_data.get("transaction-id"),
-            "transaction_type": raw_data.get("type", "other"),
-            "symbol": raw_data.get("symbol", ""),
-            "amount": raw_data.get("amount"),
-        }
-        
-        self.assertEqual(transaction_data['transaction_id'], 'TXN123')
-        self.assertEqual(transaction_data['transaction_type'], 'trade')
-        self.assertEqual(transaction_data['amount'], 1000.50)
\ No newline at end of file
+
+
+# API response data parsing and validation - no database access
+
+def test_position_data_extraction(api_factory):
+    """Test that position data is correctly extracted from API response"""
+    api = api_factory(username='testuser', password='testpass')
+
+    # Test with minimal data
+    raw_data = {
+        "symbol": "TEST",
+        "instrument-type": "stock",
+        "quantity": 100
+    }
+
+    # This would be part of the fetch_positions logic
+    position_data = {
+        "asset_type": raw_data.get("instrument-type", "other"),
+        "symbol": raw_data.get("symbol"),
+        "quantity": raw_data.get("quantity", 0),
+        "description": raw_data.get("description", ""),
+    }
+
+    assert position_data['asset_type'] == 'stock'
+    assert position_data['symbol'] == 'TEST'
+    assert position_data['quantity'] == 100
+    assert position_data['description'] == ''
+
+
+def test_transaction_data_extraction(api_factory):
+    """Test that transaction data is correctly extracted from API response"""
+    api = api_factory(username='testuser', password='testpass')
+
+    raw_data = {
+        "transaction-id": "TXN123",
+        "type": "trade",
+        "symbol": "AAPL",
+        "amount": 1000.50,
+        "transaction-date": "2024-05-29T14:30:00Z"
+    }
+
+    # This would be part of the fetch_transactions logic
+    transaction_data = {
+        "transaction_id": raw_data.get("transaction-id"),
+        "transaction_type": raw_data.get("type", "other"),
+        "symbol": raw_data.get("symbol", ""),
+        "amount": raw_data.get("amount"),
+    }
+
+    assert transaction_data['transaction_id'] == 'TXN123'
+    assert transaction_data['transaction_type'] == 'trade'
+    assert transaction_data['amount'] == 1000.50
@@ -1,22 +1,56 @@
 """
 Test fixtures and data factories for TastyTrade tests
 Provides consistent test data for financial data testing
+
+The create_many_* factories insert with bulk_create in batches of
+TASTYTRADE_BULK_CREATE_BATCH_SIZE rows (environment variable, default 500).
+Smaller batches bound memory and SQL statement size; larger ones save
+round-trips. They pass ignore_conflicts=True, so re-running a factory
+against a kept test database (--reuse-db) skips rows that already exist.
+The returned objects are the input instances and do not get primary keys.
 """
 
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
 from decimal import Decimal
 from datetime import datetime, date, timezone
+from types import MappingProxyType
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import QuerySet, Sum
 from apps.tastytrade.models import TastyTradeCredential, Position, Transaction
 
 User = get_user_model()
 
 
+@lru_cache(maxsize=256)
+def _d(value):
+    """Decimal from a string literal, parsed once (Decimals are immutable)"""
+    return Decimal(value)
+
+
 class TastyTradeTestDataFactory:
     """Factory for creating test data objects"""
     
+    BATCH_SIZE = int(os.environ.get('TASTYTRADE_BULK_CREATE_BATCH_SIZE', '500'))
+    
     @staticmethod
-    def create_test_user(username='testuser', email='test@example.com', password='testpass123'):
-        """Create a test user"""
+    def create_test_user(username='testuser', email='test@example.com', password='testpass123', fast=False):
+        """
+        Create a test user
+        
+        With fast=True the password is ignored and set unusable, so no hasher
+        runs; use it for users that never log in. config.settings_test already
+        swaps PBKDF2 for MD5PasswordHasher, which keeps the default path cheap.
+        """
+        if fast:
+            user = User(username=username, email=email)
+            user.set_unusable_password()
+            user.save()
+            return user
         return User.objects.create_user(
             username=username,
             email=email,
@@ -34,47 +68,125 @@ class TastyTradeTestDataFactory:
         )
     
     @staticmethod
-    def create_test_stock_position(user, credential, symbol='AAPL', quantity='100.0000'):
-        """Create a test stock position"""
-        return Position.objects.create(
+    def build_test_stock_position(user, credential, symbol='AAPL', quantity='100.0000'):
+        """Build an unsaved test stock position"""
+        return Position(
             user=user,
             credential=credential,
             tastytrade_account_number='123456789',
             asset_type='stock',
             symbol=symbol,
             description=f'{symbol} Stock',
-            quantity=Decimal(quantity),
-            average_price=Decimal('150.2500'),
-            market_value=Decimal('15025.00'),
-            unrealized_pnl=Decimal('500.00'),
-            realized_pnl=Decimal('200.00')
+            quantity=_d(quantity),
+            average_price=_d('150.2500'),
+            market_value=_d('15025.00'),
+            unrealized_pnl=_d('500.00'),
+            realized_pnl=_d('200.00')
+        )
+    
+    @classmethod
+    def create_test_stock_position(cls, user, credential, symbol='AAPL', quantity='100.0000'):
+        """Create a test stock position"""
+        position = cls.build_test_stock_position(user, credential, symbol, quantity)
+        position.save()
+        return position
+    
+    @classmethod
+    def create_many_stock_positions(cls, user, credential, n):
+        """Create n stock positions (SYM0..SYMn-1) with one multi-row INSERT per batch"""
+        return Position.objects.bulk_create(
+            [cls.build_test_stock_position(user, credential, symbol=f'SYM{i}') for i in range(n)],
+            batch_size=cls.BATCH_SIZE,
+            ignore_conflicts=True
         )
     
     @staticmethod
-    def create_test_option_position(user, credential, symbol='AAPL', option_type='call'):
-        """Create a test option position"""
-        return Position.objects.create(
+    def build_test_option_position(user, credential, symbol='AAPL', option_type='call', strike='150.0000', expiry=None):
+        """Build an unsaved test option position (expiry defaults to TEST_OPTION_EXPIRY)"""
+        expiry = expiry or TEST_OPTION_EXPIRY
+        return Position(
             user=user,
             credential=credential,
             tastytrade_account_number='123456789',
             asset_type='option',
             symbol=symbol,
-            description=f'{symbol} Dec 20 2024 150 {option_type.title()}',
-            quantity=Decimal('10.0000'),
-            average_price=Decimal('5.2500'),
-            market_value=Decimal('5250.00'),
-            delta=Decimal('0.6500'),
-            theta=Decimal('-0.0250'),
-            beta=Decimal('1.2000'),
-            expiry=date(2024, 12, 20),
-            strike=Decimal('150.0000'),
+            description=f'{symbol} {expiry:%b %d %Y} {_d(strike).normalize():f} {option_type.title()}',
+            quantity=_d('10.0000'),
+            average_price=_d('5.2500'),
+            market_value=_d('5250.00'),
+            delta=_d('0.6500'),
+            theta=_d('-0.0250'),
+            beta=_d('1.2000'),
+            expiry=expiry,
+            strike=_d(strike),
             option_type=option_type
         )
     
+    @classmethod
+    def create_test_option_position(cls, user, credential, symbol='AAPL', option_type='call'):
+        """Create a test option position"""
+        position = cls.build_test_option_position(user, credential, symbol, option_type)
+        position.save()
+        return position
+    
+    @classmethod
+    def create_many_option_positions(cls, user, credential, n, symbol='AAPL', option_type='call'):
+        """Create n option positions on one underlying, strikes 150, 151, ..., in bulk"""
+        return Position.objects.bulk_create(
+            [
+                cls.build_test_option_position(user, credential, symbol, option_type, strike=f'{150 + i}.0000')
+                for i in range(n)
+            ],
+            batch_size=cls.BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    
+    @classmethod
+    def build_option_position_matrix(cls, user, credential, symbols=None, option_type='call'):
+        """Create one option position per symbol x TEST_OPTION_STRIKES x TEST_OPTION_EXPIRIES, in bulk"""
+        return Position.objects.bulk_create(
+            [
+                cls.build_test_option_position(user, credential, symbol, option_type, strike=strike, expiry=expiry)
+                for symbol, strike, expiry in product(
+                    symbols or TEST_SYMBOLS, TEST_OPTION_STRIKES, TEST_OPTION_EXPIRIES
+                )
+            ],
+            batch_size=cls.BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    
     @staticmethod
-    def create_test_trade_transaction(user, credential, transaction_id='TXN123', symbol='AAPL'):
-        """Create a test trade transaction"""
-        return Transaction.objects.create(
+    def position_insert_fields():
+        """Concrete, non-auto Position fields, in the column order raw_insert_positions() expects"""
+        return [field for field in Position._meta.concrete_fields if not field.auto_created]
+    
+    @classmethod
+    def raw_insert_positions(cls, rows):
+        """
+        Insert position rows with one executemany, bypassing the ORM
+        
+        rows are tuples of database-ready values in position_insert_fields()
+        order (foreign keys as ids). No model instances, signals or pre_save
+        hooks run, so the caller supplies what save() would fill in: the
+        auto_now timestamps, and position_key, computed with
+        models.position_key() from the row's own asset_type, symbol, expiry,
+        strike and option_type. A wrong key escapes the unique constraint
+        and sync's upsert.
+        """
+        fields = cls.position_insert_fields()
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Position._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields))
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+    
+    @staticmethod
+    def build_test_trade_transaction(user, credential, transaction_id='TXN123', symbol='AAPL'):
+        """Build an unsaved test trade transaction"""
+        return Transaction(
             user=user,
             credential=credential,
             tastytrade_account_number='123456789',
@@ -82,17 +194,33 @@ class TastyTradeTestDataFactory:
             transaction_type='trade',
             symbol=symbol,
             description=f'Buy 100 {symbol}',
-            quantity=Decimal('100.0000'),
-            price=Decimal('150.2500'),
-            amount=Decimal('15025.00'),
-            trade_date=datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc),
+            quantity=_d('100.0000'),
+            price=_d('150.2500'),
+            amount=_d('15025.00'),
+            trade_date=TEST_TRADE_DATE,
             asset_type='stock'
         )
     
+    @classmethod
+    def create_test_trade_transaction(cls, user, credential, transaction_id='TXN123', symbol='AAPL'):
+        """Create a test trade transaction"""
+        txn = cls.build_test_trade_transaction(user, credential, transaction_id, symbol)
+        txn.save()
+        return txn
+    
+    @classmethod
+    def create_many_trade_transactions(cls, user, credential, n, symbol='AAPL'):
+        """Create n trade transactions (TXN0..TXNn-1) in bulk"""
+        return Transaction.objects.bulk_create(
+            [cls.build_test_trade_transaction(user, credential, f'TXN{i}', symbol) for i in range(n)],
+            batch_size=cls.BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    
     @staticmethod
-    def create_test_dividend_transaction(user, credential, transaction_id='DIV123', symbol='AAPL'):
-        """Create a test dividend transaction"""
-        return Transaction.objects.create(
+    def build_test_dividend_transaction(user, credential, transaction_id='DIV123', symbol='AAPL'):
+        """Build an unsaved test dividend transaction"""
+        return Transaction(
             user=user,
             credential=credential,
             tastytrade_account_number='123456789',
@@ -100,186 +228,336 @@ class TastyTradeTestDataFactory:
             transaction_type='dividend',
             symbol=symbol,
             description=f'{symbol} Dividend',
-            amount=Decimal('24.00'),
+            amount=_d('24.00'),
             trade_date=datetime(2024, 5, 29, 9, 0, 0, tzinfo=timezone.utc)
         )
+    
+    @classmethod
+    def create_test_dividend_transaction(cls, user, credential, transaction_id='DIV123', symbol='AAPL'):
+        """Create a test dividend transaction"""
+        txn = cls.build_test_dividend_transaction(user, credential, transaction_id, symbol)
+        txn.save()
+        return txn
+    
+    @classmethod
+    def create_many_dividend_transactions(cls, user, credential, n, symbol='AAPL'):
+        """Create n dividend transactions (DIV0..DIVn-1) in bulk"""
+        return Transaction.objects.bulk_create(
+            [cls.build_test_dividend_transaction(user, credential, f'DIV{i}', symbol) for i in range(n)],
+            batch_size=cls.BATCH_SIZE,
+            ignore_conflicts=True
+        )
+    
+    @classmethod
+    def build_full_portfolio(cls, user_kwargs, positions=(), transactions=(), credential_kwargs=None):
+        """
+        Create a user, their credential, positions and transactions in one transaction
+        
+        positions and transactions are lists of field dicts; user and credential
+        are filled in. Returns (user, credential, positions, transactions); the
+        position and transaction instances have no primary keys.
+        """
+        with transaction.atomic():
+            user = User.objects.create_user(**user_kwargs)
+            credential = cls.create_test_credential(user, **(credential_kwargs or {}))
+            created_positions = Position.objects.bulk_create(
+                [Position(user=user, credential=credential, **spec) for spec in positions],
+                batch_size=cls.BATCH_SIZE,
+                ignore_conflicts=True
+            )
+            created_transactions = Transaction.objects.bulk_create(
+                [Transaction(user=user, credential=credential, **spec) for spec in transactions],
+                batch_size=cls.BATCH_SIZE,
+                ignore_conflicts=True
+            )
+        return user, credential, created_positions, created_transactions
+
+
+class CredentialFixture:
+    """
+    TestCase mixin: one user and credential per class, built in setUpTestData
+    
+    Use as class FooTests(CredentialFixture, TestCase).
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user, cls.credential, _, _ = TastyTradeTestDataFactory.build_full_portfolio({
+            'username': 'testuser',
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+
+
+def freeze_json(value):
+    """Recursively wrap dicts in MappingProxyType and lists in tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_json(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_json(item) for item in value)
+    return value
+
+
+def thaw_json(value):
+    """Plain dict/list deep copy of a freeze_json() payload"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw_json(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_json(item) for item in value]
+    return value
+
+
+# Canonical API payloads, built once at import and read-only
+_LOGIN_RESPONSE = freeze_json({
+    "data": {
+        "session-token": "test-session-token-12345",
+        "user": {
+            "username": "testuser",
+            "email": "test@example.com",
+            "external-id": "test-user-id"
+        },
+        "session-expiration": "2024-05-30T15:39:02.806Z"
+    },
+    "context": "/sessions"
+})
+
+_ACCOUNTS_RESPONSE = freeze_json({
+    "data": [
+        {
+            "account-number": "123456789",
+            "account-type": "Individual",
+            "status": "Active"
+        },
+        {
+            "account-number": "987654321",
+            "account-type": "IRA",
+            "status": "Active"
+        }
+    ]
+})
+
+_POSITIONS_RESPONSE = freeze_json({
+    "data": [
+        {
+            "instrument-type": "stock",
+            "symbol": "AAPL",
+            "description": "Apple Inc.",
+            "quantity": 100,
+            "average-price": 150.25,
+            "market-value": 15025.00,
+            "unrealized-pnl": 500.00,
+            "realized-pnl": 200.00,
+            "delta": 1.0,
+            "theta": 0.0,
+            "beta": 1.2
+        },
+        {
+            "instrument-type": "option",
+            "symbol": "SPY",
+            "description": "SPY Dec 20 2024 450 Call",
+            "quantity": 5,
+            "average-price": 8.50,
+            "market-value": 4250.00,
+            "unrealized-pnl": -125.00,
+            "delta": 0.65,
+            "theta": -0.025,
+            "beta": 0.95,
+            "expiration-date": "2024-12-20",
+            "strike-price": 450.00,
+            "put-call": "call"
+        },
+        {
+            "instrument-type": "option",
+            "symbol": "QQQ",
+            "description": "QQQ Jan 17 2025 380 Put",
+            "quantity": -2,
+            "average-price": 12.75,
+            "market-value": -2550.00,
+            "unrealized-pnl": 200.00,
+            "delta": -0.35,
+            "theta": -0.015,
+            "beta": 1.1,
+            "expiration-date": "2025-01-17",
+            "strike-price": 380.00,
+            "put-call": "put"
+        }
+    ]
+})
+
+_TRANSACTIONS_RESPONSE = freeze_json({
+    "data": [
+        {
+            "transaction-id": "TXN123456",
+            "type": "trade",
+            "symbol": "AAPL",
+            "description": "Buy 100 AAPL",
+            "quantity": 100,
+            "price": 150.25,
+            "amount": 15025.00,
+            "transaction-date": "2024-05-29T14:30:00Z",
+            "instrument-type": "stock"
+        },
+        {
+            "transaction-id": "TXN789012",
+            "type": "trade",
+            "symbol": "SPY",
+            "description": "Buy to Open 5 SPY Dec 20 2024 450 Call",
+            "quantity": 5,
+            "price": 8.50,
+            "amount": 4250.00,
+            "transaction-date": "2024-05-28T11:15:00Z",
+            "instrument-type": "option",
+            "expiration-date": "2024-12-20",
+            "strike-price": 450.00,
+            "put-call": "call"
+        },
+        {
+            "transaction-id": "DIV345678",
+            "type": "dividend",
+            "symbol": "AAPL",
+            "description": "AAPL Dividend Payment",
+            "amount": 24.00,
+            "transaction-date": "2024-05-15T09:00:00Z",
+            "instrument-type": "stock"
+        },
+        {
+            "transaction-id": "FEE901234",
+            "type": "fee",
+            "description": "Regulatory Fee",
+            "amount": -1.50,
+            "transaction-date": "2024-05-29T14:30:00Z"
+        }
+    ]
+})
+
+_USER_INFO_RESPONSE = freeze_json({
+    "data": {
+        "username": "testuser",
+        "email": "test@example.com",
+        "external-id": "test-user-id",
+        "is-confirmed": True
+    }
+})
+
+_ERROR_RESPONSE_401 = freeze_json({
+    "error": {
+        "code": "invalid_credentials",
+        "message": "Invalid login, please check your username and password."
+    }
+})
+
+_ERROR_RESPONSE_403 = freeze_json({
+    "error": {
+        "code": "not_permitted",
+        "message": "User not permitted access"
+    }
+})
+
+_EMPTY_DATA_RESPONSE = freeze_json({
+    "data": []
+})
+
+
+@dataclass(frozen=True, slots=True)
+class _CachedResponse:
+    """Read-only API payload with its JSON body serialized once at import"""
+    payload: MappingProxyType
+    json_bytes: bytes
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(payload=payload, json_bytes=json.dumps(thaw_json(payload)).encode())
 
 
 class MockTastyTradeAPIResponses:
-    """Mock API responses for testing"""
+    """Mock API responses for testing
+
+    Each method returns a shared read-only payload; use the *_mutable()
+    variants for a private copy a test can edit, or *_json() for the
+    pre-serialized bytes body. ACCOUNTS, POSITIONS and TRANSACTIONS expose
+    both as .payload and .json_bytes.
+    """
+    
+    ACCOUNTS = _CachedResponse.from_payload(_ACCOUNTS_RESPONSE)
+    POSITIONS = _CachedResponse.from_payload(_POSITIONS_RESPONSE)
+    TRANSACTIONS = _CachedResponse.from_payload(_TRANSACTIONS_RESPONSE)
     
     @staticmethod
     def successful_login_response():
         """Mock successful login response"""
-        return {
-            "data": {
-                "session-token": "test-session-token-12345",
-                "user": {
-                    "username": "testuser",
-                    "email": "test@example.com",
-                    "external-id": "test-user-id"
-                },
-                "session-expiration": "2024-05-30T15:39:02.806Z"
-            },
-            "context": "/sessions"
-        }
+        return _LOGIN_RESPONSE
     
     @staticmethod
     def accounts_response():
         """Mock accounts API response"""
-        return {
-            "data": [
-                {
-                    "account-number": "123456789",
-                    "account-type": "Individual",
-                    "status": "Active"
-                },
-                {
-                    "account-number": "987654321",
-                    "account-type": "IRA",
-                    "status": "Active"
-                }
-            ]
-        }
+        return _ACCOUNTS_RESPONSE
+    
+    @staticmethod
+    def accounts_response_mutable():
+        """Mock accounts API response as an editable deep copy"""
+        return thaw_json(_ACCOUNTS_RESPONSE)
+    
+    @staticmethod
+    def accounts_response_json():
+        """Mock accounts API response as a serialized JSON body"""
+        return MockTastyTradeAPIResponses.ACCOUNTS.json_bytes
     
     @staticmethod
     def positions_response():
         """Mock positions API response"""
-        return {
-            "data": [
-                {
-                    "instrument-type": "stock",
-                    "symbol": "AAPL",
-                    "description": "Apple Inc.",
-                    "quantity": 100,
-                    "average-price": 150.25,
-                    "market-value": 15025.00,
-                    "unrealized-pnl": 500.00,
-                    "realized-pnl": 200.00,
-                    "delta": 1.0,
-                    "theta": 0.0,
-                    "beta": 1.2
-                },
-                {
-                    "instrument-type": "option",
-                    "symbol": "SPY",
-                    "description": "SPY Dec 20 2024 450 Call",
-                    "quantity": 5,
-                    "average-price": 8.50,
-                    "market-value": 4250.00,
-                    "unrealized-pnl": -125.00,
-                    "delta": 0.65,
-                    "theta": -0.025,
-                    "beta": 0.95,
-                    "expiration-date": "2024-12-20",
-                    "strike-price": 450.00,
-                    "put-call": "call"
-                },
-                {
-                    "instrument-type": "option",
-                    "symbol": "QQQ",
-                    "description": "QQQ Jan 17 2025 380 Put",
-                    "quantity": -2,
-                    "average-price": 12.75,
-                    "market-value": -2550.00,
-                    "unrealized-pnl": 200.00,
-                    "delta": -0.35,
-                    "theta": -0.015,
-                    "beta": 1.1,
-                    "expiration-date": "2025-01-17",
-                    "strike-price": 380.00,
-                    "put-call": "put"
-                }
-            ]
-        }
+        return _POSITIONS_RESPONSE
+    
+    @staticmethod
+    def positions_response_mutable():
+        """Mock positions API response as an editable deep copy"""
+        return thaw_json(_POSITIONS_RESPONSE)
+    
+    @staticmethod
+    def positions_response_json():
+        """Mock positions API response as a serialized JSON body"""
+        return MockTastyTradeAPIResponses.POSITIONS.json_bytes
     
     @staticmethod
     def transactions_response():
         """Mock transactions API response"""
-        return {
-            "data": [
-                {
-                    "transaction-id": "TXN123456",
-                    "type": "trade",
-                    "symbol": "AAPL",
-                    "description": "Buy 100 AAPL",
-                    "quantity": 100,
-                    "price": 150.25,
-                    "amount": 15025.00,
-                    "transaction-date": "2024-05-29T14:30:00Z",
-                    "instrument-type": "stock"
-                },
-                {
-                    "transaction-id": "TXN789012",
-                    "type": "trade",
-                    "symbol": "SPY",
-                    "description": "Buy to Open 5 SPY Dec 20 2024 450 Call",
-                    "quantity": 5,
-                    "price": 8.50,
-                    "amount": 4250.00,
-                    "transaction-date": "2024-05-28T11:15:00Z",
-                    "instrument-type": "option",
-                    "expiration-date": "2024-12-20",
-                    "strike-price": 450.00,
-                    "put-call": "call"
-                },
-                {
-                    "transaction-id": "DIV345678",
-                    "type": "dividend",
-                    "symbol": "AAPL",
-                    "description": "AAPL Dividend Payment",
-                    "amount": 24.00,
-                    "transaction-date": "2024-05-15T09:00:00Z",
-                    "instrument-type": "stock"
-                },
-                {
-                    "transaction-id": "FEE901234",
-                    "type": "fee",
-                    "description": "Regulatory Fee",
-                    "amount": -1.50,
-                    "transaction-date": "2024-05-29T14:30:00Z"
-                }
-            ]
-        }
+        return _TRANSACTIONS_RESPONSE
+    
+    @staticmethod
+    def transactions_response_mutable():
+        """Mock transactions API response as an editable deep copy"""
+        return thaw_json(_TRANSACTIONS_RESPONSE)
+    
+    @staticmethod
+    def transactions_response_json():
+        """Mock transactions API response as a serialized JSON body"""
+        return MockTastyTradeAPIResponses.TRANSACTIONS.json_bytes
     
     @staticmethod
     def user_info_response():
         """Mock user info API response"""
-        return {
-            "data": {
-                "username": "testuser",
-                "email": "test@example.com",
-                "external-id": "test-user-id",
-                "is-confirmed": True
-            }
-        }
+        return _USER_INFO_RESPONSE
     
     @staticmethod
     def error_response_401():
         """Mock 401 Unauthorized error response"""
-        return {
-            "error": {
-                "code": "invalid_credentials",
-                "message": "Invalid login, please check your username and password."
-            }
-        }
+        return _ERROR_RESPONSE_401
     
     @staticmethod
     def error_response_403():
         """Mock 403 Not Permitted error response"""
-        return {
-            "error": {
-                "code": "not_permitted",
-                "message": "User not permitted access"
-            }
-        }
+        return _ERROR_RESPONSE_403
     
     @staticmethod
     def empty_data_response():
         """Mock empty data response"""
-        return {
-            "data": []
-        }
+        return _EMPTY_DATA_RESPONSE
+
+
+_VALID_ASSET_TYPES = frozenset(choice for choice, _ in Position.ASSET_TYPE_CHOICES)
+_NUMERIC_TYPES = (int, float, Decimal)
+_POSITION_REQUIRED_FIELDS = ('asset_type', 'symbol', 'quantity')
+_TRANSACTION_REQUIRED_FIELDS = ('transaction_id', 'transaction_type', 'amount', 'trade_date')
 
 
 class FinancialTestDataValidation:
@@ -291,30 +569,37 @@ class FinancialTestDataValidation:
         if value is None:
             return True
         
-        # Convert to string to check precision
-        str_value = str(value)
-        if '.' in str_value:
-            integer_part, decimal_part = str_value.split('.')
-            total_digits = len(integer_part) + len(decimal_part)
-            return (total_digits <= max_digits and 
-                   len(decimal_part) <= decimal_places)
+        # Floats go through their shortest repr so 0.1 stays one decimal place
+        if isinstance(value, float):
+            value = repr(value)
+        
+        # Count digits the way Django's DecimalValidator does, straight from
+        # the decimal's tuple form
+        _, digits, exponent = Decimal(value).as_tuple()
+        if exponent >= 0:
+            # Positive exponent (e.g. 1E+2): trailing integer zeros
+            total_digits = len(digits) + exponent if digits != (0,) else 1
+            decimal_digits = 0
+        elif -exponent > len(digits):
+            # Leading zeros after the point (e.g. 0.001) count as digits
+            total_digits = decimal_digits = -exponent
         else:
-            return len(str_value) <= max_digits
+            total_digits = len(digits)
+            decimal_digits = -exponent
+        return total_digits <= max_digits and decimal_digits <= decimal_places
     
     @staticmethod
     def validate_position_data(position_dict):
         """Validate position data structure and types"""
-        required_fields = ['asset_type', 'symbol', 'quantity']
-        
-        for field in required_fields:
+        for field in _POSITION_REQUIRED_FIELDS:
             if field not in position_dict:
                 return False, f"Missing required field: {field}"
         
         # Validate data types
-        if not isinstance(position_dict['quantity'], (int, float, Decimal)):
+        if not isinstance(position_dict['quantity'], _NUMERIC_TYPES):
             return False, "Quantity must be numeric"
         
-        if position_dict['asset_type'] not in ['stock', 'option', 'future', 'crypto', 'other']:
+        if position_dict['asset_type'] not in _VALID_ASSET_TYPES:
             return False, f"Invalid asset_type: {position_dict['asset_type']}"
         
         return True, "Valid"
@@ -322,14 +607,12 @@ class FinancialTestDataValidation:
     @staticmethod
     def validate_transaction_data(transaction_dict):
         """Validate transaction data structure and types"""
-        required_fields = ['transaction_id', 'transaction_type', 'amount', 'trade_date']
-        
-        for field in required_fields:
+        for field in _TRANSACTION_REQUIRED_FIELDS:
             if field not in transaction_dict:
                 return False, f"Missing required field: {field}"
         
         # Validate data types
-        if not isinstance(transaction_dict['amount'], (int, float, Decimal)):
+        if not isinstance(transaction_dict['amount'], _NUMERIC_TYPES):
             return False, "Amount must be numeric"
         
         if not isinstance(transaction_dict['trade_date'], datetime):
@@ -340,6 +623,20 @@ class FinancialTestDataValidation:
     @staticmethod
     def calculate_position_pnl(positions):
         """Calculate total P&L from positions for validation"""
+        if isinstance(positions, QuerySet):
+            # One SQL aggregate instead of materializing every row
+            totals = positions.aggregate(
+                total_unrealized=Sum('unrealized_pnl'),
+                total_realized=Sum('realized_pnl')
+            )
+            total_unrealized = totals['total_unrealized'] or Decimal('0.00')
+            total_realized = totals['total_realized'] or Decimal('0.00')
+            return {
+                'total_unrealized': total_unrealized,
+                'total_realized': total_realized,
+                'total_pnl': total_unrealized + total_realized
+            }
+        
         total_unrealized = Decimal('0.00')
         total_realized = Decimal('0.00')
         
@@ -356,19 +653,25 @@ class FinancialTestDataValidation:
         }
 
 
-# Test data constants
-TEST_ACCOUNT_NUMBERS = ['123456789', '987654321', '555666777']
+# Test data constants (tuples keep order; *_SET twins for membership checks)
+TEST_TRADE_DATE = datetime(2024, 5, 29, 14, 30, tzinfo=timezone.utc)
+TEST_OPTION_EXPIRY = date(2024, 12, 20)
+
+TEST_ACCOUNT_NUMBERS = ('123456789', '987654321', '555666777')
+TEST_ACCOUNT_NUMBERS_SET = frozenset(TEST_ACCOUNT_NUMBERS)
 
-TEST_SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'SPY', 'QQQ', 'IWM']
+TEST_SYMBOLS = ('AAPL', 'GOOGL', 'MSFT', 'TSLA', 'SPY', 'QQQ', 'IWM')
+TEST_SYMBOLS_SET = frozenset(TEST_SYMBOLS)
 
-TEST_OPTION_STRIKES = [Decimal('100.00'), Decimal('150.00'), Decimal('200.00'), 
-                      Decimal('250.00'), Decimal('300.00')]
+TEST_OPTION_STRIKES = (Decimal('100.00'), Decimal('150.00'), Decimal('200.00'), 
+                       Decimal('250.00'), Decimal('300.00'))
+TEST_OPTION_STRIKES_SET = frozenset(TEST_OPTION_STRIKES)
 
-TEST_OPTION_EXPIRIES = [
+TEST_OPTION_EXPIRIES = (
     date(2024, 6, 21),
     date(2024, 7, 19),
     date(2024, 8, 16),
     date(2024, 9, 20),
-    date(2024, 12, 20),
+    TEST_OPTION_EXPIRY,
     date(2025, 1, 17)
-]
\ No newline at end of file
+)
\ No newline at end of file
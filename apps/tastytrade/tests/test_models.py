@@ -6,10 +6,13 @@ Financial data requires high confidence - comprehensive testing is essential
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from decimal import Decimal
-from datetime import date, datetime, timezone
-from apps.tastytrade.models import TastyTradeCredential, Position, Transaction
+from datetime import datetime, timezone
+from apps.tastytrade.models import TastyTradeCredential, Position, Transaction, position_key
+from apps.tastytrade.tests.test_fixtures import (
+    TEST_OPTION_EXPIRY, TEST_TRADE_DATE, CredentialFixture, TastyTradeTestDataFactory,
+)
 
 User = get_user_model()
 
@@ -63,12 +66,13 @@ class TastyTradeCredentialTests(TestCase):
         
         # Should not be able to create another credential for same user
         with self.assertRaises(IntegrityError):
-            TastyTradeCredential.objects.create(
-                user=self.user,
-                environment='sandbox',
-                username='user2',
-                password='pass2'
-            )
+            with transaction.atomic():
+                TastyTradeCredential.objects.create(
+                    user=self.user,
+                    environment='sandbox',
+                    username='user2',
+                    password='pass2'
+                )
 
     def test_credential_str_representation(self):
         """Test string representation"""
@@ -94,22 +98,9 @@ class TastyTradeCredentialTests(TestCase):
             credential.full_clean()
 
 
-class PositionTests(TestCase):
+class PositionTests(CredentialFixture, TestCase):
     """Test Position model"""
 
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='testuser',
-            password='testpass'
-        )
-
     def test_create_stock_position(self):
         """Test creating a stock position"""
         position = Position.objects.create(
@@ -136,7 +127,7 @@ class PositionTests(TestCase):
 
     def test_create_option_position(self):
         """Test creating an option position"""
-        expiry_date = date(2024, 12, 20)
+        expiry_date = TEST_OPTION_EXPIRY
         position = Position.objects.create(
             user=self.user,
             credential=self.credential,
@@ -162,7 +153,7 @@ class PositionTests(TestCase):
 
     def test_position_unique_together_constraint(self):
         """Test unique_together constraint for positions"""
-        expiry_date = date(2024, 12, 20)
+        expiry_date = TEST_OPTION_EXPIRY
         
         # Create first option position with specific values
         Position.objects.create(
@@ -179,21 +170,44 @@ class PositionTests(TestCase):
         
         # Attempting to create duplicate option position should fail
         with self.assertRaises(IntegrityError):
-            Position.objects.create(
-                user=self.user,
-                credential=self.credential,
-                tastytrade_account_number='123456789',
-                asset_type='option',
-                symbol='AAPL',
-                quantity=Decimal('20.0000'),  # Different quantity, but same unique fields
-                expiry=expiry_date,
-                strike=Decimal('150.0000'),
-                option_type='call'
-            )
+            with transaction.atomic():
+                Position.objects.create(
+                    user=self.user,
+                    credential=self.credential,
+                    tastytrade_account_number='123456789',
+                    asset_type='option',
+                    symbol='AAPL',
+                    quantity=Decimal('20.0000'),  # Different quantity, but same unique fields
+                    expiry=expiry_date,
+                    strike=Decimal('150.0000'),
+                    option_type='call'
+                )
+
+    def test_position_unique_constraint_covers_stocks(self):
+        """Test that a stock position (no expiry/strike) can't be stored twice"""
+        Position.objects.create(
+            user=self.user,
+            credential=self.credential,
+            tastytrade_account_number='123456789',
+            asset_type='stock',
+            symbol='AAPL',
+            quantity=Decimal('10.0000'),
+        )
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Position.objects.create(
+                    user=self.user,
+                    credential=self.credential,
+                    tastytrade_account_number='123456789',
+                    asset_type='stock',
+                    symbol='AAPL',
+                    quantity=Decimal('20.0000'),
+                )
 
     def test_position_allows_different_option_types(self):
         """Test that positions with different option types are allowed"""
-        expiry_date = date(2024, 12, 20)
+        expiry_date = TEST_OPTION_EXPIRY
         
         # Create call option
         Position.objects.create(
@@ -224,6 +238,47 @@ class PositionTests(TestCase):
         # Should have 2 positions
         self.assertEqual(Position.objects.count(), 2)
 
+    def test_raw_insert_positions_keeps_unique_key(self):
+        """Test that raw-inserted positions carry the key the unique constraint checks"""
+        fields = TastyTradeTestDataFactory.position_insert_fields()
+        key = position_key('option', 'AAPL', TEST_OPTION_EXPIRY, Decimal('150.0000'), 'call')
+        values = {
+            'user_id': self.user.pk,
+            'credential_id': self.credential.pk,
+            'tastytrade_account_number': '123456789',
+            'asset_type': 'option',
+            'symbol': 'AAPL',
+            'description': '',
+            'quantity': Decimal('10.0000'),
+            'expiry': TEST_OPTION_EXPIRY,
+            'strike': Decimal('150.0000'),
+            'option_type': 'call',
+            'last_updated': TEST_TRADE_DATE,
+            'position_key': key,
+        }
+        TastyTradeTestDataFactory.raw_insert_positions([
+            tuple(field.get_db_prep_save(values.get(field.attname), connection) for field in fields)
+        ])
+
+        position = Position.objects.get(symbol='AAPL', asset_type='option')
+        self.assertEqual(position.position_key, key)
+        self.assertEqual(position.strike, Decimal('150.0000'))
+
+        # The same option through the ORM hits the raw row's key
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Position.objects.create(
+                    user=self.user,
+                    credential=self.credential,
+                    tastytrade_account_number='123456789',
+                    asset_type='option',
+                    symbol='AAPL',
+                    quantity=Decimal('20.0000'),
+                    expiry=TEST_OPTION_EXPIRY,
+                    strike=Decimal('150.0000'),
+                    option_type='call'
+                )
+
     def test_position_str_representation(self):
         """Test string representation"""
         position = Position.objects.create(
@@ -239,25 +294,12 @@ class PositionTests(TestCase):
         self.assertEqual(str(position), expected)
 
 
-class TransactionTests(TestCase):
+class TransactionTests(CredentialFixture, TestCase):
     """Test Transaction model"""
 
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='testuser',
-            password='testpass'
-        )
-
     def test_create_trade_transaction(self):
         """Test creating a trade transaction"""
-        trade_date = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
+        trade_date = TEST_TRADE_DATE
         transaction = Transaction.objects.create(
             user=self.user,
             credential=self.credential,
@@ -283,7 +325,7 @@ class TransactionTests(TestCase):
 
     def test_create_dividend_transaction(self):
         """Test creating a dividend transaction"""
-        trade_date = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
+        trade_date = TEST_TRADE_DATE
         transaction = Transaction.objects.create(
             user=self.user,
             credential=self.credential,
@@ -302,7 +344,7 @@ class TransactionTests(TestCase):
 
     def test_transaction_unique_id_constraint(self):
         """Test unique transaction_id constraint"""
-        trade_date = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
+        trade_date = TEST_TRADE_DATE
         
         # Create first transaction
         Transaction.objects.create(
@@ -317,50 +359,49 @@ class TransactionTests(TestCase):
         
         # Attempting to create transaction with same ID should fail
         with self.assertRaises(IntegrityError):
-            Transaction.objects.create(
-                user=self.user,
-                credential=self.credential,
-                tastytrade_account_number='987654321',
-                transaction_id='TXN123456',  # Same ID
-                transaction_type='trade',
-                amount=Decimal('2000.00'),
-                trade_date=trade_date
-            )
+            with transaction.atomic():
+                Transaction.objects.create(
+                    user=self.user,
+                    credential=self.credential,
+                    tastytrade_account_number='987654321',
+                    transaction_id='TXN123456',  # Same ID
+                    transaction_type='trade',
+                    amount=Decimal('2000.00'),
+                    trade_date=trade_date
+                )
 
     def test_transaction_ordering(self):
         """Test transaction ordering by trade_date descending"""
         date1 = datetime(2024, 5, 28, 14, 30, 0, tzinfo=timezone.utc)
-        date2 = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
-        
-        # Create transactions in random order
-        txn2 = Transaction.objects.create(
-            user=self.user,
-            credential=self.credential,
-            tastytrade_account_number='123456789',
-            transaction_id='TXN2',
-            transaction_type='trade',
-            amount=Decimal('2000.00'),
-            trade_date=date2
-        )
+        date2 = TEST_TRADE_DATE
         
-        txn1 = Transaction.objects.create(
-            user=self.user,
-            credential=self.credential,
-            tastytrade_account_number='123456789',
-            transaction_id='TXN1',
-            transaction_type='trade',
-            amount=Decimal('1000.00'),
-            trade_date=date1
-        )
+        # Insert the older row first so the result can't come from insertion order
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                credential=self.credential,
+                tastytrade_account_number='123456789',
+                transaction_id=transaction_id,
+                transaction_type='trade',
+                amount=amount,
+                trade_date=trade_date
+            )
+            for transaction_id, amount, trade_date in (
+                ('TXN1', Decimal('1000.00'), date1),
+                ('TXN2', Decimal('2000.00'), date2),
+            )
+        ])
         
         # Should be ordered by trade_date descending (newest first)
-        transactions = list(Transaction.objects.all())
-        self.assertEqual(transactions[0], txn2)  # More recent date first
-        self.assertEqual(transactions[1], txn1)
+        self.assertEqual(Transaction._meta.ordering, ['-trade_date'])
+        self.assertEqual(
+            list(Transaction.objects.values_list('transaction_id', flat=True)),
+            ['TXN2', 'TXN1']
+        )
 
     def test_transaction_str_representation(self):
         """Test string representation"""
-        trade_date = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
+        trade_date = TEST_TRADE_DATE
         transaction = Transaction.objects.create(
             user=self.user,
             credential=self.credential,
@@ -376,22 +417,9 @@ class TransactionTests(TestCase):
         self.assertEqual(str(transaction), expected)
 
 
-class ModelValidationTests(TestCase):
+class ModelValidationTests(CredentialFixture, TestCase):
     """Test model validations for financial data integrity"""
 
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='testuser',
-            password='testpass'
-        )
-
     def test_decimal_precision_validation(self):
         """Test that decimal fields maintain proper precision"""
         position = Position.objects.create(
@@ -415,13 +443,14 @@ class ModelValidationTests(TestCase):
         """Test that required fields are enforced"""
         # Position without required user should fail
         with self.assertRaises(IntegrityError):
-            Position.objects.create(
-                credential=self.credential,
-                tastytrade_account_number='123456789',
-                asset_type='stock',
-                symbol='TEST',
-                quantity=Decimal('100.0000')
-            )
+            with transaction.atomic():
+                Position.objects.create(
+                    credential=self.credential,
+                    tastytrade_account_number='123456789',
+                    asset_type='stock',
+                    symbol='TEST',
+                    quantity=Decimal('100.0000')
+                )
 
     def test_choice_field_validation(self):
         """Test that choice fields only accept valid values"""
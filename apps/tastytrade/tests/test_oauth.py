@@ -1,24 +1,84 @@
-from unittest.mock import Mock, patch, MagicMock
-from django.test import TestCase, Client
+"""
+Tests for TastyTrade OAuth 2.0 support: API client, views and end-to-end flow
+Classes share no fixed primary keys, caches or files, so they are safe to run
+with python manage.py test apps.tastytrade.tests.test_oauth --parallel=auto
+"""
+
+import copy
+from dataclasses import dataclass
+from functools import cache
+from unittest.mock import Mock, patch
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
 from django.utils import timezone
 from datetime import timedelta
+from apps.tastytrade import tastytrade_api as _tt
 from apps.tastytrade.models import TastyTradeCredential
 from apps.tastytrade.tastytrade_api import TastyTradeAPI
 
 User = get_user_model()
 
 
-class OAuthAPIClientTestCase(TestCase):
+@cache
+def _u(name):
+    """reverse() once per URL name; the URLconf doesn't change between tests"""
+    return reverse(name)
+
+
+@dataclass(slots=True)
+class FakeResponse:
+    """Plain requests.Response stand-in: status code, JSON body and text"""
+    status_code: int
+    _json: dict = None
+    text: str = ''
+
+    def json(self):
+        return self._json
+
+
+class _StubTransport:
+    """Session.post/get replacement: returns one response and records (url, kwargs)"""
+    __slots__ = ('response', 'calls')
+
+    def __init__(self, response=None):
+        self.response = response
+        self.calls = []
+
+    def __call__(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.response
+
+
+class _SessionStub:
+    """requests.Session stand-in with plain post, get and headers attributes"""
+    __slots__ = ('post', 'get', 'headers')
+
+
+_SESSION_STUB = _SessionStub()
+
+
+def configure_session_stub(post_response=None, get_response=None):
+    """Reset the shared session stub to serve the given responses"""
+    _SESSION_STUB.post = _StubTransport(post_response)
+    _SESSION_STUB.get = _StubTransport(get_response)
+    _SESSION_STUB.headers = {}
+    return _SESSION_STUB
+
+
+@override_settings(
+    TASTYTRADE_OAUTH_CLIENT_ID='test_client_id',
+    TASTYTRADE_OAUTH_CLIENT_SECRET='test_client_secret',
+    TASTYTRADE_OAUTH_REDIRECT_URI='http://localhost:8000/callback',
+)
+class OAuthLogicTestCase(SimpleTestCase):
+    """API client logic that only reads in-memory state: no database, no transactions"""
+
     def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
+        # Unsaved credential: without a pk the client gets a plain requests.Session
+        self.credential = TastyTradeCredential(
+            user=User(pk=1, username='testuser'),
             environment='sandbox',
             username='test_user',
             password='test_pass'
@@ -26,170 +86,159 @@ class OAuthAPIClientTestCase(TestCase):
 
     def test_oauth_client_configuration_check(self):
         """Test OAuth client configuration detection"""
-        # Test with OAuth configured
-        with patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_ID', 'test_client_id'), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_SECRET', 'test_client_secret'):
-            
-            self.credential.access_token = 'test_access_token'
-            self.credential.save()
-            
-            api = TastyTradeAPI(self.credential)
-            self.assertTrue(api._can_use_oauth())
-            self.assertEqual(api.auth_method, 'oauth')
+        # OAuth is configured for the whole class
+        self.credential.access_token = 'test_access_token'
+        
+        api = TastyTradeAPI(self.credential)
+        self.assertTrue(api._can_use_oauth())
+        self.assertEqual(api.auth_method, 'oauth')
 
+    @override_settings(TASTYTRADE_OAUTH_CLIENT_ID=None, TASTYTRADE_OAUTH_CLIENT_SECRET=None)
     def test_oauth_disabled_fallback_to_session(self):
         """Test fallback to session auth when OAuth not configured"""
-        with patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_ID', None), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_SECRET', None):
-            
-            api = TastyTradeAPI(self.credential)
-            self.assertFalse(api._can_use_oauth())
-            self.assertEqual(api.auth_method, 'session')
+        api = TastyTradeAPI(self.credential)
+        self.assertFalse(api._can_use_oauth())
+        self.assertEqual(api.auth_method, 'session')
 
     def test_oauth_authorization_url_generation(self):
         """Test OAuth authorization URL generation"""
-        with patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_ID', 'test_client_id'), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_SECRET', 'test_client_secret'), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_REDIRECT_URI', 'http://localhost:8000/callback'):
-            
-            api = TastyTradeAPI(self.credential)
-            auth_url = api.get_oauth_authorization_url()
-            
-            self.assertIn('https://api.cert.tastyworks.com/oauth/authorize', auth_url)
-            self.assertIn('client_id=test_client_id', auth_url)
-            self.assertIn('redirect_uri=http://localhost:8000/callback', auth_url)
-            self.assertIn('response_type=code', auth_url)
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    @patch('apps.tastytrade.tastytrade_api.settings')
-    def test_oauth_token_exchange(self, mock_settings, mock_post):
-        """Test OAuth authorization code to token exchange"""
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_ID = 'test_client_id'
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_SECRET = 'test_client_secret'
-        mock_settings.TASTYTRADE_OAUTH_REDIRECT_URI = 'http://localhost:8000/callback'
-        
-        # Mock successful token response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            'access_token': 'new_access_token',
-            'refresh_token': 'new_refresh_token',
-            'expires_in': 900
-        }
-        mock_post.return_value = mock_response
-        
         api = TastyTradeAPI(self.credential)
-        token_data = api.exchange_code_for_tokens('test_auth_code')
+        auth_url = api.get_oauth_authorization_url()
         
-        # Verify API call
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
-        self.assertEqual(call_args[0][0], 'https://api.cert.tastyworks.com/oauth/token')
-        
-        # Verify token data
-        self.assertEqual(token_data['access_token'], 'new_access_token')
-        self.assertEqual(token_data['refresh_token'], 'new_refresh_token')
-        
-        # Verify credential was updated
-        self.credential.refresh_from_db()
-        self.assertEqual(self.credential.access_token, 'new_access_token')
-        self.assertEqual(self.credential.refresh_token, 'new_refresh_token')
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.post')
-    @patch('apps.tastytrade.tastytrade_api.settings')
-    def test_oauth_token_refresh(self, mock_settings, mock_post):
-        """Test OAuth token refresh functionality"""
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_ID = 'test_client_id'
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_SECRET = 'test_client_secret'
-        
-        self.credential.refresh_token = 'test_refresh_token'
-        self.credential.save()
-        
-        # Mock successful refresh response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            'access_token': 'refreshed_access_token',
-            'refresh_token': 'new_refresh_token',
-            'expires_in': 900
-        }
-        mock_post.return_value = mock_response
+        self.assertIn('https://api.cert.tastyworks.com/oauth/authorize', auth_url)
+        self.assertIn('client_id=test_client_id', auth_url)
+        self.assertIn('redirect_uri=http://localhost:8000/callback', auth_url)
+        self.assertIn('response_type=code', auth_url)
+
+    def test_oauth_token_expiry_check(self):
+        """Test OAuth token expiry validation"""
+        # Set up a real current time (no mocking needed)
+        current_time = timezone.now()
         
         api = TastyTradeAPI(self.credential)
-        success = api._refresh_access_token()
         
-        self.assertTrue(success)
+        # Test token not expired
+        api.token_expires_at = current_time + timedelta(minutes=5)
+        self.assertTrue(api._is_token_valid())
         
-        # Verify credential was updated
-        self.credential.refresh_from_db()
-        self.assertEqual(self.credential.access_token, 'refreshed_access_token')
-        self.assertEqual(self.credential.refresh_token, 'new_refresh_token')
+        # Test token expired
+        api.token_expires_at = current_time - timedelta(minutes=5)
+        self.assertFalse(api._is_token_valid())
+        
+        # Test no expiry time
+        api.token_expires_at = None
+        self.assertFalse(api._is_token_valid())
 
-    def test_oauth_token_expiry_check(self):
-        """Test OAuth token expiry validation"""
-        with patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_ID', 'test_client_id'), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_SECRET', 'test_client_secret'):
-            
-            # Set up a real current time (no mocking needed)
-            current_time = timezone.now()
-            
-            api = TastyTradeAPI(self.credential)
-            
-            # Test token not expired
-            api.token_expires_at = current_time + timedelta(minutes=5)
-            self.assertTrue(api._is_token_valid())
-            
-            # Test token expired
-            api.token_expires_at = current_time - timedelta(minutes=5)
-            self.assertFalse(api._is_token_valid())
-            
-            # Test no expiry time
-            api.token_expires_at = None
-            self.assertFalse(api._is_token_valid())
-
-    @patch('apps.tastytrade.tastytrade_api.requests.Session.get')
+    @patch.object(_tt.requests.Session, 'get')
     def test_oauth_authentication_with_refresh(self, mock_get):
         """Test OAuth authentication with automatic token refresh"""
-        with patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_ID', 'test_client_id'), \
-             patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.OAUTH_CLIENT_SECRET', 'test_client_secret'):
-            
-            self.credential.access_token = 'expired_token'
-            self.credential.refresh_token = 'valid_refresh_token'
-            self.credential.save()
-            
-            api = TastyTradeAPI(self.credential)
-            
-            # Mock initial 401 response (expired token)
-            mock_expired_response = Mock()
-            mock_expired_response.status_code = 401
-            mock_expired_response.text = 'Token expired'
-            
-            # Mock successful response after refresh
-            mock_success_response = Mock()
-            mock_success_response.status_code = 200
-            mock_success_response.text = '{"data": {"user": "test"}}'
-            
-            mock_get.side_effect = [mock_expired_response, mock_success_response]
-            
-            # Mock the token refresh
-            with patch.object(api, '_refresh_access_token', return_value=True):
-                result = api.test_session()
-                self.assertTrue(result)
-            
-            # Verify two calls were made (initial + retry)
-            self.assertEqual(mock_get.call_count, 2)
+        self.credential.access_token = 'expired_token'
+        self.credential.refresh_token = 'valid_refresh_token'
+        
+        api = TastyTradeAPI(self.credential)
+        
+        # Mock initial 401 response (expired token)
+        mock_expired_response = FakeResponse(401, text='Token expired')
+        
+        # Mock successful response after refresh
+        mock_success_response = FakeResponse(200, text='{"data": {"user": "test"}}')
+        
+        mock_get.side_effect = [mock_expired_response, mock_success_response]
+        
+        # Mock the token refresh
+        with patch.object(api, '_refresh_access_token', return_value=True):
+            result = api.test_session()
+            self.assertTrue(result)
+        
+        # Verify two calls were made (initial + retry)
+        self.assertEqual(mock_get.call_count, 2)
 
 
-class OAuthViewsTestCase(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
+@override_settings(
+    TASTYTRADE_OAUTH_CLIENT_ID='test_client_id',
+    TASTYTRADE_OAUTH_CLIENT_SECRET='test_client_secret',
+    TASTYTRADE_OAUTH_REDIRECT_URI='http://localhost:8000/callback',
+)
+class OAuthAPIClientTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='testuser', email='test@example.com')
+        cls.credential = TastyTradeCredential.objects.create(
+            user=cls.user,
+            environment='sandbox',
+            username='test_user',
+            password='test_pass'
         )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Built once with the class OAuth settings; tests get cheap clones
+        cls._api_template = TastyTradeAPI(cls.credential)
+
+    def _make_api(self):
+        """TastyTradeAPI for self.credential, cloned from the class template instead of rebuilt"""
+        api = copy.copy(self._api_template)
+        api.credential = self.credential
+        # Own session object and headers; connection adapters stay shared
+        api.session = copy.copy(self._api_template.session)
+        api.session.headers = self._api_template.session.headers.copy()
+        api.auth_method = 'oauth' if api._can_use_oauth() else 'session'
+        return api
+
+    def test_oauth_token_flows(self):
+        """Test OAuth code exchange, then refresh with the exchanged refresh token"""
+        session = configure_session_stub()
+        api = self._make_api()
+        api.session = session
+        
+        flows = [
+            ('exchange', api.exchange_code_for_tokens, ('test_auth_code',), 'new_access_token', 'new_refresh_token'),
+            ('refresh', api._refresh_access_token, (), 'refreshed_access_token', 'rotated_refresh_token'),
+        ]
+        for name, call, args, access_token, refresh_token in flows:
+            with self.subTest(flow=name):
+                # Mock successful token response
+                session.post = _StubTransport(FakeResponse(200, {
+                    'access_token': access_token,
+                    'refresh_token': refresh_token,
+                    'expires_in': 900
+                }))
+                
+                self.assertTrue(call(*args))
+                
+                # Verify API call
+                self.assertEqual(len(session.post.calls), 1)
+                self.assertEqual(session.post.calls[0][0], 'https://api.cert.tastyworks.com/oauth/token')
+                
+                # Verify credential was updated
+                self.credential.refresh_from_db(fields=['access_token', 'refresh_token'])
+                self.assertEqual(self.credential.access_token, access_token)
+                self.assertEqual(self.credential.refresh_token, refresh_token)
+                self.assertEqual(session.headers['Authorization'], f'Bearer {access_token}')
+        
+        # The refresh sent the refresh token issued by the exchange
+        self.assertEqual(session.post.calls[0][1]['json']['refresh_token'], 'new_refresh_token')
+
+    def test_token_refresh_clears_cached_oauth_status(self):
+        """Test that refreshing tokens drops the user's cached oauth_status"""
+        api = self._make_api()
+        api.session.post = _StubTransport(FakeResponse(200, {'access_token': 'refreshed_access_token'}))
+        cache_key = _tt.oauth_status_cache_key(self.user.id)
+        django_cache.set(cache_key, {'has_access_token': False})
+
+        api._refresh_access_token()
+
+        self.assertIsNone(django_cache.get(cache_key))
+
+
+class OAuthViewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # No password: tests log in with force_login, so nothing is hashed
+        cls.user = User.objects.create(username='testuser', email='test@example.com')
+        cls.credential = TastyTradeCredential.objects.create(
+            user=cls.user,
             environment='sandbox',
             username='test_user',
             password='test_pass'
@@ -197,30 +246,30 @@ class OAuthViewsTestCase(TestCase):
 
     def test_oauth_authorize_view_requires_login(self):
         """Test OAuth authorize view requires authentication"""
-        url = reverse('tastytrade_oauth_authorize')
+        url = _u('tastytrade_oauth_authorize')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 302)  # Redirect to login
 
     def test_oauth_authorize_view_requires_credential(self):
         """Test OAuth authorize view requires existing credential"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         self.credential.delete()  # Remove credential
         
-        url = reverse('tastytrade_oauth_authorize')
+        url = _u('tastytrade_oauth_authorize')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 302)  # Redirect to connect
 
     @patch('apps.tastytrade.views.TastyTradeAPI')
     def test_oauth_authorize_view_success(self, mock_api_class):
         """Test successful OAuth authorization initiation"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
         # Mock API instance
         mock_api = Mock()
         mock_api.get_oauth_authorization_url.return_value = 'https://tastytrade.com/oauth/auth?client_id=test'
         mock_api_class.return_value = mock_api
         
-        url = reverse('tastytrade_oauth_authorize')
+        url = _u('tastytrade_oauth_authorize')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, 302)
@@ -228,18 +277,18 @@ class OAuthViewsTestCase(TestCase):
 
     def test_oauth_callback_view_with_error(self):
         """Test OAuth callback view handles authorization errors"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
-        url = reverse('tastytrade_oauth_callback')
+        url = _u('tastytrade_oauth_callback')
         response = self.client.get(url, {'error': 'access_denied'})
         
         self.assertEqual(response.status_code, 302)  # Redirect
         
     def test_oauth_callback_view_missing_code(self):
         """Test OAuth callback view handles missing authorization code"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
-        url = reverse('tastytrade_oauth_callback')
+        url = _u('tastytrade_oauth_callback')
         response = self.client.get(url)  # No code parameter
         
         self.assertEqual(response.status_code, 302)  # Redirect
@@ -247,7 +296,7 @@ class OAuthViewsTestCase(TestCase):
     @patch('apps.tastytrade.views.TastyTradeAPI')
     def test_oauth_callback_view_success(self, mock_api_class):
         """Test successful OAuth callback with authorization code"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
         # Mock API instance
         mock_api = Mock()
@@ -257,7 +306,7 @@ class OAuthViewsTestCase(TestCase):
         }
         mock_api_class.return_value = mock_api
         
-        url = reverse('tastytrade_oauth_callback')
+        url = _u('tastytrade_oauth_callback')
         response = self.client.get(url, {'code': 'test_auth_code'})
         
         self.assertEqual(response.status_code, 302)  # Redirect
@@ -265,9 +314,9 @@ class OAuthViewsTestCase(TestCase):
 
     def test_oauth_status_view_json_response(self):
         """Test OAuth status view returns JSON status"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
-        url = reverse('tastytrade_oauth_status')
+        url = _u('tastytrade_oauth_status')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, 200)
@@ -279,22 +328,37 @@ class OAuthViewsTestCase(TestCase):
         self.assertIn('has_refresh_token', data)
         self.assertIn('auth_method', data)
 
+    def test_oauth_status_cached_until_revoke(self):
+        """Test that the status is served from cache until tokens are revoked"""
+        self.client.force_login(self.user)
+        url = _u('tastytrade_oauth_status')
+        TastyTradeCredential.objects.filter(pk=self.credential.pk).update(access_token='test_access_token')
+        self.assertTrue(self.client.get(url).json()['has_access_token'])
+
+        # A change outside the OAuth views is picked up only when the entry expires
+        TastyTradeCredential.objects.filter(pk=self.credential.pk).update(access_token=None)
+        self.assertTrue(self.client.get(url).json()['has_access_token'])
+
+        self.client.get(_u('tastytrade_oauth_revoke'))
+        self.assertFalse(self.client.get(url).json()['has_access_token'])
+
     def test_oauth_revoke_view(self):
         """Test OAuth token revocation"""
-        self.client.login(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
         
-        # Set up tokens
-        self.credential.access_token = 'test_access_token'
-        self.credential.refresh_token = 'test_refresh_token'
-        self.credential.save()
+        # Set up tokens (the view loads its own copy, so write just these columns)
+        TastyTradeCredential.objects.filter(pk=self.credential.pk).update(
+            access_token='test_access_token',
+            refresh_token='test_refresh_token'
+        )
         
-        url = reverse('tastytrade_oauth_revoke')
+        url = _u('tastytrade_oauth_revoke')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, 302)  # Redirect
         
         # Verify tokens were cleared
-        self.credential.refresh_from_db()
+        self.credential.refresh_from_db(fields=['access_token', 'refresh_token'])
         self.assertIsNone(self.credential.access_token)
         self.assertIsNone(self.credential.refresh_token)
 
@@ -302,50 +366,35 @@ class OAuthViewsTestCase(TestCase):
 class OAuthIntegrationTestCase(TestCase):
     """Integration tests for OAuth functionality"""
     
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='testuser', email='test@example.com')
+        cls.credential = TastyTradeCredential.objects.create(
+            user=cls.user,
             environment='sandbox',
             username='test_user',
             password='test_pass'
         )
 
-    @patch('apps.tastytrade.tastytrade_api.requests.Session')
-    @patch('apps.tastytrade.tastytrade_api.settings')
-    def test_oauth_end_to_end_flow(self, mock_settings, mock_session_class):
+    @override_settings(
+        TASTYTRADE_OAUTH_CLIENT_ID='test_client_id',
+        TASTYTRADE_OAUTH_CLIENT_SECRET='test_client_secret',
+        TASTYTRADE_OAUTH_REDIRECT_URI='http://localhost:8000/callback',
+    )
+    @patch.object(_tt.requests, 'Session', autospec=True)
+    def test_oauth_end_to_end_flow(self, mock_session_class):
         """Test complete OAuth flow from authorization to API calls"""
-        # Configure OAuth settings
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_ID = 'test_client_id'
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_SECRET = 'test_client_secret'
-        mock_settings.TASTYTRADE_OAUTH_REDIRECT_URI = 'http://localhost:8000/callback'
-        
-        # Mock session responses
-        mock_session = Mock()
+        # Token exchange response, then the API call response
+        mock_session = configure_session_stub(
+            post_response=FakeResponse(200, {
+                'access_token': 'oauth_access_token',
+                'refresh_token': 'oauth_refresh_token',
+                'expires_in': 900
+            }),
+            get_response=FakeResponse(200, {'data': {'username': 'test_user'}}),
+        )
         mock_session_class.return_value = mock_session
         
-        # Mock token exchange response
-        token_response = Mock()
-        token_response.status_code = 200
-        token_response.json.return_value = {
-            'access_token': 'oauth_access_token',
-            'refresh_token': 'oauth_refresh_token',
-            'expires_in': 900
-        }
-        
-        # Mock API call response
-        api_response = Mock()
-        api_response.status_code = 200
-        api_response.json.return_value = {'data': {'username': 'test_user'}}
-        
-        mock_session.post.return_value = token_response
-        mock_session.get.return_value = api_response
-        mock_session.headers = {}
-        
         # Initialize API client
         api = TastyTradeAPI(self.credential)
         
@@ -354,7 +403,7 @@ class OAuthIntegrationTestCase(TestCase):
         
         # Verify token exchange
         self.assertEqual(token_data['access_token'], 'oauth_access_token')
-        self.credential.refresh_from_db()
+        self.credential.refresh_from_db(fields=['access_token'])
         self.assertEqual(self.credential.access_token, 'oauth_access_token')
         
         # Step 2: Make authenticated API call
@@ -366,13 +415,13 @@ class OAuthIntegrationTestCase(TestCase):
         for key, value in expected_header.items():
             self.assertEqual(mock_session.headers[key], value)
 
-    @patch('apps.tastytrade.tastytrade_api.settings')
-    def test_oauth_graceful_fallback_to_session_auth(self, mock_settings):
+    # Configure OAuth but don't set tokens
+    @override_settings(
+        TASTYTRADE_OAUTH_CLIENT_ID='test_client_id',
+        TASTYTRADE_OAUTH_CLIENT_SECRET='test_client_secret',
+    )
+    def test_oauth_graceful_fallback_to_session_auth(self):
         """Test graceful fallback to session auth when OAuth fails"""
-        # Configure OAuth but don't set tokens
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_ID = 'test_client_id'
-        mock_settings.TASTYTRADE_OAUTH_CLIENT_SECRET = 'test_client_secret'
-        
         # No OAuth tokens set on credential
         api = TastyTradeAPI(self.credential)
         
@@ -0,0 +1,61 @@
+"""
+Unit tests for Black-Scholes Greeks calculations
+Pure math - no database access required
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from apps.tastytrade.options_pricing import (
+    black_scholes_greeks,
+    black_scholes_delta_theta_batch,
+    option_greek_inputs,
+)
+
+
+class BlackScholesBatchTests(SimpleTestCase):
+    """Test the batched delta/theta kernel against the scalar model"""
+
+    INPUTS = [
+        (100.0, 95.0, 0.30, 0.25, True),
+        (130.0, 180.0, 0.10, 0.45, True),
+        (100.0, 95.0, 0.30, 0.25, False),
+        (50.0, 50.0, 1.00, 0.20, False),
+    ]
+
+    def test_batch_matches_scalar_greeks(self):
+        """Test that each batched row equals black_scholes_greeks delta/theta"""
+        results = black_scholes_delta_theta_batch(self.INPUTS)
+
+        self.assertEqual(len(results), len(self.INPUTS))
+        for (spot, strike, time_to_expiry, volatility, is_call), (delta, theta) in zip(self.INPUTS, results):
+            _, expected_delta, _, expected_theta, _ = black_scholes_greeks(
+                spot, strike, time_to_expiry,
+                volatility=volatility,
+                option_type='call' if is_call else 'put'
+            )
+            self.assertAlmostEqual(delta, expected_delta, places=9)
+            self.assertAlmostEqual(theta, expected_theta, places=9)
+
+    def test_expired_option_has_zero_greeks(self):
+        """Test that a zero time to expiry yields zero delta and theta"""
+        self.assertEqual(
+            black_scholes_delta_theta_batch([(100.0, 95.0, 0.0, 0.25, True)]),
+            [(0.0, 0.0)]
+        )
+
+    def test_expired_option_inputs_are_floats(self):
+        """Test that an expired option's inputs are floats like every other row of the batch"""
+        inputs = option_greek_inputs(
+            'AAPL  200117C00150000', Decimal('1.25'), Decimal('150.0000'), date(2020, 1, 17), 'call'
+        )
+
+        self.assertEqual(inputs, (150.0, 150.0, 0.0, 0.25, True))
+        self.assertIs(type(inputs[0]), float)
+        self.assertIs(type(inputs[1]), float)
+
+    def test_empty_batch(self):
+        """Test that an empty batch returns no results"""
+        self.assertEqual(black_scholes_delta_theta_batch([]), [])
@@ -3,243 +3,457 @@ Integration tests for TastyTrade views and sync workflows
 Tests end-to-end functionality including view logic and database operations
 """
 
-from unittest.mock import Mock, patch
-from django.test import TestCase, Client
+from functools import cache
+from unittest.mock import DEFAULT, patch
+
+import pytest
+from django.test import RequestFactory, SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.core.cache import cache as django_cache
 from django.contrib.messages import get_messages
-from django.utils import timezone
-from datetime import datetime, date
+from pytest_django.asserts import assertContains
+from django.db import connection, transaction as db_transaction
+from django.test.utils import CaptureQueriesContext
+from datetime import date, datetime, timezone
 from decimal import Decimal
+from types import MappingProxyType
 
 from apps.tastytrade.models import TastyTradeCredential, Position, Transaction
-from apps.tastytrade.views import sync_tastytrade
+from apps.tastytrade.views import sync_tastytrade, transaction_types_cache_key
 
 User = get_user_model()
 
+# API payloads shared by the sync tests. Built once and read-only: the sync
+# only reads position dicts, and transaction rows are unpacked into new
+# Transaction instances per test
+_TRADE_DATE = datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc)
 
-class TastyTradeViewTests(TestCase):
-    """Test TastyTrade views and authentication requirements"""
+_AAPL_POSITION = MappingProxyType({
+    'asset_type': 'stock',
+    'symbol': 'AAPL',
+    'description': 'Apple Inc.',
+    'quantity': Decimal('100.0000'),
+    'average_price': Decimal('150.25'),
+    'market_value': Decimal('15025.00'),
+    'unrealized_pnl': Decimal('500.00'),
+    'realized_pnl': Decimal('200.00'),
+    'delta': None,
+    'theta': None,
+    'beta': None,
+    'expiry': None,
+    'strike': None,
+    'option_type': None
+})
 
-    def setUp(self):
-        self.client = Client()
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
+# Same position with updated quantity and price, no P&L
+_AAPL_POSITION_UPDATE = MappingProxyType({
+    **_AAPL_POSITION,
+    'unrealized_pnl': None,
+    'realized_pnl': None,
+})
 
-    def test_connect_view_requires_authentication(self):
-        """Test that connect view requires user to be logged in"""
-        response = self.client.get(reverse('tastytrade_connect'))
-        
-        # Should redirect to login
-        self.assertEqual(response.status_code, 302)
-        self.assertIn('/accounts/login/', response.url)
-
-    def test_connect_view_authenticated_no_credential(self):
-        """Test connect view for authenticated user without credentials"""
-        self.client.login(username='testuser', password='testpass123')
-        response = self.client.get(reverse('tastytrade_connect'))
-        
-        self.assertEqual(response.status_code, 200)
-        self.assertContains(response, 'Connect Your TastyTrade Account')
-        self.assertContains(response, 'Connect Account')  # Submit button text
+_AAPL_TRANSACTION = MappingProxyType({
+    'transaction_id': 'TXN123',
+    'transaction_type': 'trade',
+    'symbol': 'AAPL',
+    'description': 'Buy 100 AAPL',
+    'quantity': Decimal('100.0000'),
+    'price': Decimal('150.25'),
+    'amount': Decimal('15025.00'),
+    'trade_date': _TRADE_DATE,
+    'asset_type': 'stock',
+    'expiry': None,
+    'strike': None,
+    'option_type': None
+})
 
-    def test_connect_view_authenticated_with_credential(self):
-        """Test connect view for authenticated user with existing credentials"""
-        credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='existing_user',
-            password='existing_pass'
-        )
-        
-        self.client.login(username='testuser', password='testpass123')
-        response = self.client.get(reverse('tastytrade_connect'))
-        
-        self.assertEqual(response.status_code, 200)
-        self.assertContains(response, 'Connected as: existing_user')
-        self.assertContains(response, 'Update Credentials')
-        self.assertContains(response, 'Remove')
-
-    def test_connect_view_post_create_credential(self):
-        """Test creating new credentials via POST"""
-        self.client.login(username='testuser', password='testpass123')
-        
-        response = self.client.post(reverse('tastytrade_connect'), {
-            'username': 'newuser',
-            'password': 'newpass'
-        })
-        
-        # Should redirect back to connect page
-        self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('tastytrade_connect'))
-        
-        # Credential should be created
-        credential = TastyTradeCredential.objects.get(user=self.user)
-        self.assertEqual(credential.username, 'newuser')
-        self.assertEqual(credential.password, 'newpass')
-        self.assertEqual(credential.environment, 'prod')  # Default
-
-    def test_connect_view_post_update_credential(self):
-        """Test updating existing credentials via POST"""
-        credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='olduser',
-            password='oldpass'
-        )
-        
-        self.client.login(username='testuser', password='testpass123')
-        
-        response = self.client.post(reverse('tastytrade_connect'), {
-            'username': 'updateduser',
-            'password': 'updatedpass'
-        })
-        
-        # Should redirect back to connect page
-        self.assertEqual(response.status_code, 302)
-        
-        # Credential should be updated
-        credential.refresh_from_db()
-        self.assertEqual(credential.username, 'updateduser')
-        self.assertEqual(credential.password, 'updatedpass')
-
-    def test_remove_credential_view(self):
-        """Test removing credentials"""
-        credential = TastyTradeCredential.objects.create(
-            user=self.user,
-            environment='prod',
-            username='toremove',
-            password='toremove'
+# Same transaction ID as an existing row, with an updated description
+_AAPL_TRANSACTION_UPDATE = MappingProxyType({
+    **_AAPL_TRANSACTION,
+    'description': 'Updated description',
+})
+
+# _AAPL_TRANSACTION as the API sends it, with decimals as strings
+_AAPL_TRANSACTION_STRINGS = MappingProxyType({
+    **_AAPL_TRANSACTION,
+    'quantity': '100',
+    'price': '150.25',
+    'amount': '15025.00',
+})
+
+_INCOMPLETE_POSITIONS = (
+    MappingProxyType({
+        'asset_type': 'stock',
+        'symbol': None,  # Missing required symbol
+        'quantity': Decimal('100.0000'),
+    }),
+    MappingProxyType({
+        'asset_type': 'stock',
+        'symbol': 'VALID',  # This one should be saved
+        'quantity': Decimal('50.0000'),
+    }),
+)
+
+_INCOMPLETE_TRANSACTIONS = (
+    MappingProxyType({
+        'transaction_id': None,  # Missing required ID
+        'transaction_type': 'trade',
+        'amount': Decimal('1000.00'),
+        'trade_date': _TRADE_DATE,
+    }),
+    MappingProxyType({
+        'transaction_id': 'VALID123',  # This one should be saved
+        'transaction_type': 'trade',
+        'amount': Decimal('2000.00'),
+        'trade_date': _TRADE_DATE,
+    }),
+)
+
+
+# One factory serves every test; requests it builds carry full WSGI environs
+_REQUEST_FACTORY = RequestFactory()
+
+
+def _make_post_request(user):
+    """POST to the sync URL from user, for calling sync_tastytrade directly"""
+    request = _REQUEST_FACTORY.post('/tastytrade/sync/')
+    request.user = user
+    return request
+
+
+@cache
+def _u(name):
+    """reverse() once per URL name; the URLconf doesn't change between tests"""
+    return reverse(name)
+
+
+# View tests: plain pytest functions on pytest-django's client, with the
+# view_user and authed_client fixtures from conftest.py
+
+def test_connect_view_requires_authentication(client):
+    """Test that connect view requires user to be logged in"""
+    response = client.get(_u('tastytrade_connect'))
+    
+    # Should redirect to login
+    assert response.status_code == 302
+    assert '/accounts/login/' in response.url
+
+
+@pytest.mark.django_db
+def test_connect_view_authenticated_no_credential(authed_client):
+    """Test connect view for authenticated user without credentials"""
+    response = authed_client.get(_u('tastytrade_connect'))
+    
+    assert response.status_code == 200
+    assertContains(response, 'Connect Your TastyTrade Account')
+    assertContains(response, 'Connect Account')  # Submit button text
+
+
+@pytest.mark.django_db
+def test_connect_clears_cached_oauth_status(authed_client):
+    """Test that connecting an account isn't hidden by a cached 'not connected' status"""
+    url = _u('tastytrade_oauth_status')
+    assert authed_client.get(url).json()['auth_method'] == 'none'
+
+    response = authed_client.post(_u('tastytrade_connect'), {
+        'environment': 'prod', 'username': 'testuser', 'password': 'testpass',
+    })
+
+    assert response.status_code == 302
+    assert authed_client.get(url).json()['auth_method'] != 'none'
+
+
+@pytest.mark.django_db
+def test_connect_view_authenticated_with_credential(authed_client, view_user):
+    """Test connect view for authenticated user with existing credentials"""
+    TastyTradeCredential.objects.create(
+        user=view_user,
+        environment='prod',
+        username='existing_user',
+        password='existing_pass'
+    )
+    
+    response = authed_client.get(_u('tastytrade_connect'))
+    
+    assert response.status_code == 200
+    assertContains(response, 'Connected as: existing_user')
+    assertContains(response, 'Update Credentials')
+    assertContains(response, 'Remove')
+
+
+@pytest.mark.django_db
+def test_connect_view_post_create_credential(authed_client, view_user):
+    """Test creating new credentials via POST"""
+    response = authed_client.post(_u('tastytrade_connect'), {
+        'username': 'newuser',
+        'password': 'newpass'
+    })
+    
+    # Should redirect back to connect page
+    assert response.status_code == 302
+    assert response.url == _u('tastytrade_connect')
+    
+    # Credential should be created
+    credential = TastyTradeCredential.objects.get(user=view_user)
+    assert credential.username == 'newuser'
+    assert credential.password == 'newpass'
+    assert credential.environment == 'prod'  # Default
+
+
+@pytest.mark.django_db
+def test_connect_view_post_update_credential(authed_client, view_user):
+    """Test updating existing credentials via POST"""
+    credential = TastyTradeCredential.objects.create(
+        user=view_user,
+        environment='prod',
+        username='olduser',
+        password='oldpass'
+    )
+    
+    response = authed_client.post(_u('tastytrade_connect'), {
+        'username': 'updateduser',
+        'password': 'updatedpass'
+    })
+    
+    # Should redirect back to connect page
+    assert response.status_code == 302
+    
+    # Credential should be updated
+    credential.refresh_from_db()
+    assert credential.username == 'updateduser'
+    assert credential.password == 'updatedpass'
+
+
+@pytest.mark.django_db
+def test_remove_credential_view(authed_client, view_user):
+    """Test removing credentials"""
+    TastyTradeCredential.objects.create(
+        user=view_user,
+        environment='prod',
+        username='toremove',
+        password='toremove'
+    )
+    
+    response = authed_client.post(_u('tastytrade_remove'))
+    
+    # Should redirect to connect page
+    assert response.status_code == 302
+    assert response.url == _u('tastytrade_connect')
+    
+    # Credential should be deleted
+    assert not TastyTradeCredential.objects.filter(user=view_user).exists()
+
+
+@pytest.mark.django_db
+def test_remove_credential_view_no_credential(authed_client):
+    """Test removing credentials when none exist"""
+    response = authed_client.post(_u('tastytrade_remove'))
+    
+    # Should still redirect successfully
+    assert response.status_code == 302
+    assert response.url == _u('tastytrade_connect')
+
+
+def test_sync_view_requires_authentication(client):
+    """Test that sync view requires authentication"""
+    response = client.post(_u('tastytrade_sync'))
+    
+    # Should redirect to login
+    assert response.status_code == 302
+    assert '/accounts/login/' in response.url
+
+
+@pytest.mark.django_db
+def test_sync_view_no_credentials(authed_client):
+    """Test sync view when user has no credentials"""
+    response = authed_client.post(_u('tastytrade_sync'))
+    
+    # Should redirect to home with error message
+    assert response.status_code == 302
+    assert response.url == _u('home')
+    
+    # Check error message was added
+    messages = list(get_messages(response.wsgi_request))
+    assert len(messages) == 1
+    assert 'No TastyTrade credentials found' in str(messages[0])
+
+
+@pytest.mark.django_db
+def test_sync_status_without_background_task(authed_client):
+    """Test that sync status reports no task when sync ran inline"""
+    response = authed_client.get(_u('tastytrade_sync_status'))
+
+    assert response.status_code == 200
+    assert response.json() == {'task_id': None, 'state': None, 'error': None}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('state, error, expected', [
+    ('FAILURE', 'Invalid TastyTrade credentials.', 'Invalid TastyTrade credentials.'),
+    ('SUCCESS', None, 'Sync completed successfully.'),
+])
+def test_finished_background_sync_reported_on_next_page(authed_client, state, error, expected):
+    """Test that the next page load shows a finished background sync's outcome once"""
+    session = authed_client.session
+    session['sync_task_id'] = 'task-1'
+    session.save()
+
+    with patch.multiple(
+        'apps.tastytrade.middleware',
+        sync_in_background=DEFAULT, sync_task_result=DEFAULT,
+    ) as mocks:
+        mocks['sync_in_background'].return_value = True
+        mocks['sync_task_result'].return_value = (state, error)
+        response = authed_client.get(_u('home'))
+
+    mocks['sync_task_result'].assert_called_once_with('task-1')
+    assert [str(message) for message in get_messages(response.wsgi_request)] == [expected]
+    assert 'sync_task_id' not in authed_client.session
+
+
+@pytest.mark.django_db
+def test_running_background_sync_polled_by_page(authed_client):
+    """Test that a page loaded during a background sync polls sync_status, which reports the state"""
+    session = authed_client.session
+    session['sync_task_id'] = 'task-1'
+    session.save()
+
+    with patch.multiple(
+        'apps.tastytrade.middleware',
+        sync_in_background=DEFAULT, sync_task_result=DEFAULT,
+    ) as mocks:
+        mocks['sync_in_background'].return_value = True
+        mocks['sync_task_result'].return_value = ('STARTED', None)
+        page = authed_client.get(_u('home'))
+        status = authed_client.get(_u('tastytrade_sync_status'))
+
+    assertContains(page, 'data-sync-task-state="STARTED"')
+    assert status.json() == {'task_id': 'task-1', 'state': 'STARTED', 'error': None}
+    assert authed_client.session['sync_task_id'] == 'task-1'
+
+
+@pytest.mark.django_db
+def test_credential_loaded_once_per_request(authed_client, view_user, django_assert_num_queries):
+    """Test that the middleware's credential lookup serves the rest of the request"""
+    credential = TastyTradeCredential.objects.create(
+        user=view_user, environment='prod', username='testuser', password='testpass'
+    )
+    request = authed_client.get(_u('tastytrade_connect')).wsgi_request
+
+    assert request.tastytrade_credential == credential
+    # The reverse accessor was filled by the same lookup
+    with django_assert_num_queries(0):
+        assert request.user.tastytrade_credential == credential
+
+
+@pytest.mark.django_db
+def test_credential_not_loaded_when_unused(authed_client, view_user):
+    """Test that a request which never reads the credential doesn't query it"""
+    TastyTradeCredential.objects.create(
+        user=view_user, environment='prod', username='testuser', password='testpass'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        authed_client.get(_u('tastytrade_sync_status'))
+
+    table = TastyTradeCredential._meta.db_table
+    assert not [query for query in queries if table in query['sql']]
+
+
+@pytest.mark.django_db
+def test_transactions_search_matches_partial_symbol(authed_client, view_user):
+    """Test that the transactions search still finds substrings of a symbol"""
+    credential = TastyTradeCredential.objects.create(
+        user=view_user, environment='prod', username='testuser', password='testpass'
+    )
+    for transaction_id, symbol in (('TXN1', 'AAPL'), ('TXN2', 'MSFT')):
+        Transaction.objects.create(
+            user=view_user, credential=credential, tastytrade_account_number='123456789',
+            transaction_id=transaction_id, transaction_type='trade', symbol=symbol,
+            amount=Decimal('100.00'), trade_date=_TRADE_DATE,
         )
-        
-        self.client.login(username='testuser', password='testpass123')
-        response = self.client.post(reverse('tastytrade_remove'))
-        
-        # Should redirect to connect page
-        self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('tastytrade_connect'))
-        
-        # Credential should be deleted
-        self.assertFalse(TastyTradeCredential.objects.filter(user=self.user).exists())
 
-    def test_remove_credential_view_no_credential(self):
-        """Test removing credentials when none exist"""
-        self.client.login(username='testuser', password='testpass123')
-        response = self.client.post(reverse('tastytrade_remove'))
-        
-        # Should still redirect successfully
-        self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('tastytrade_connect'))
+    response = authed_client.get(_u('transactions'), {'search': 'AAP'})
 
-    def test_sync_view_requires_authentication(self):
-        """Test that sync view requires authentication"""
-        response = self.client.post(reverse('tastytrade_sync'))
-        
-        # Should redirect to login
-        self.assertEqual(response.status_code, 302)
-        self.assertIn('/accounts/login/', response.url)
-
-    def test_sync_view_no_credentials(self):
-        """Test sync view when user has no credentials"""
-        self.client.login(username='testuser', password='testpass123')
-        response = self.client.post(reverse('tastytrade_sync'))
-        
-        # Should redirect to home with error message
-        self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('home'))
-        
-        # Check error message was added
-        messages = list(get_messages(response.wsgi_request))
-        self.assertEqual(len(messages), 1)
-        self.assertIn('No TastyTrade credentials found', str(messages[0]))
+    assert [t.symbol for t in response.context['transactions']] == ['AAPL']
+
+
+@pytest.mark.django_db
+def test_dashboard_summary_cached_until_next_sync(authed_client, view_user):
+    """Test that the dashboard reuses its summary until last_sync changes"""
+    credential = TastyTradeCredential.objects.create(
+        user=view_user, environment='prod', username='testuser', password='testpass'
+    )
+    assert authed_client.get(_u('home')).context['total_positions'] == 0
+
+    Position.objects.create(
+        user=view_user, credential=credential, tastytrade_account_number='123456789',
+        symbol='AAPL', asset_type='stock', quantity=Decimal('10'),
+    )
+    assert authed_client.get(_u('home')).context['total_positions'] == 0
+
+    credential.last_sync = datetime(2024, 1, 16, 10, 0, tzinfo=timezone.utc)
+    credential.save(update_fields=['last_sync'])
+    assert authed_client.get(_u('home')).context['total_positions'] == 1
 
 
 class SyncWorkflowIntegrationTests(TestCase):
     """Test complete sync workflow including API calls and database operations"""
 
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.credential = TastyTradeCredential.objects.create(
-            user=self.user,
+    @classmethod
+    def setUpTestData(cls):
+        # The sync tests never log in, so the user needs no password
+        cls.user = User.objects.create(username='testuser', email='test@example.com')
+        cls.credential = TastyTradeCredential.objects.create(
+            user=cls.user,
             environment='prod',
             username='testuser',
             password='testpass'
         )
 
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_transactions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_positions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_accounts')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
-    def test_successful_sync_workflow(self, mock_login, mock_fetch_accounts, 
-                                     mock_fetch_positions, mock_fetch_transactions):
+    def _transactions(self, *rows):
+        """Build unsaved Transaction rows as returned by fetch_transactions(as_model=Transaction)"""
+        return [
+            Transaction(
+                user=self.user,
+                credential=self.credential,
+                tastytrade_account_number='123456789',
+                **row
+            )
+            for row in rows
+        ]
+
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+        fetch_positions=DEFAULT, fetch_transactions=DEFAULT,
+    )
+    def test_successful_sync_workflow(self, login, test_session, fetch_accounts, fetch_positions, fetch_transactions):
         """Test complete successful sync workflow"""
         
         # Mock API responses
-        mock_login.return_value = None
-        mock_fetch_accounts.return_value = ['123456789']
-        
-        mock_fetch_positions.return_value = [
-            {
-                'asset_type': 'stock',
-                'symbol': 'AAPL',
-                'description': 'Apple Inc.',
-                'quantity': Decimal('100.0000'),
-                'average_price': Decimal('150.25'),
-                'market_value': Decimal('15025.00'),
-                'unrealized_pnl': Decimal('500.00'),
-                'realized_pnl': Decimal('200.00'),
-                'delta': None,
-                'theta': None,
-                'beta': None,
-                'expiry': None,
-                'strike': None,
-                'option_type': None
-            }
-        ]
+        login.return_value = None
+        fetch_accounts.return_value = ['123456789']
         
-        mock_fetch_transactions.return_value = [
-            {
-                'transaction_id': 'TXN123',
-                'transaction_type': 'trade',
-                'symbol': 'AAPL',
-                'description': 'Buy 100 AAPL',
-                'quantity': Decimal('100.0000'),
-                'price': Decimal('150.25'),
-                'amount': Decimal('15025.00'),
-                'trade_date': datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc),
-                'asset_type': 'stock',
-                'expiry': None,
-                'strike': None,
-                'option_type': None
-            }
-        ]
+        fetch_positions.return_value = [_AAPL_POSITION]
+        fetch_transactions.return_value = self._transactions(_AAPL_TRANSACTION)
+        types_key = transaction_types_cache_key(self.user.id, self.credential)
 
         # Perform sync
-        from apps.tastytrade.views import sync_tastytrade
-        from django.http import HttpRequest
-        from django.contrib.auth import get_user
-        
-        request = HttpRequest()
-        request.method = 'POST'
-        request.user = self.user
+        request = _make_post_request(self.user)
         
         # Mock messages framework
-        with patch('apps.tastytrade.views.messages') as mock_messages:
-            with patch('apps.tastytrade.views.redirect') as mock_redirect:
-                sync_tastytrade(request)
+        with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT) as view_mocks:
+            sync_tastytrade(request)
+        mock_messages = view_mocks['messages']
         
         # Verify API methods were called
-        mock_login.assert_called_once()
-        mock_fetch_accounts.assert_called_once()
-        mock_fetch_positions.assert_called_once_with('123456789')
-        mock_fetch_transactions.assert_called_once_with('123456789')
+        login.assert_called_once()
+        fetch_accounts.assert_called_once()
+        fetch_positions.assert_called_once_with('123456789')
+        fetch_transactions.assert_called_once_with(
+            '123456789', start_date=None, as_model=Transaction
+        )
         
         # Verify data was saved to database
         self.assertEqual(Position.objects.count(), 1)
@@ -258,62 +472,18 @@ class SyncWorkflowIntegrationTests(TestCase):
         self.credential.refresh_from_db()
         self.assertIsNotNone(self.credential.last_sync)
         
+        # The transactions page's cached type list moved to a new key
+        self.assertNotEqual(transaction_types_cache_key(self.user.id, self.credential), types_key)
+        
         # Verify success message was added
         mock_messages.success.assert_called_once()
 
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
-    def test_sync_workflow_login_failure(self, mock_login):
-        """Test sync workflow when login fails"""
-        mock_login.side_effect = Exception("Login failed: Invalid credentials")
-        
-        from django.http import HttpRequest
-        
-        request = HttpRequest()
-        request.method = 'POST'
-        request.user = self.user
-        
-        with patch('apps.tastytrade.views.messages') as mock_messages:
-            with patch('apps.tastytrade.views.redirect') as mock_redirect:
-                sync_tastytrade(request)
-        
-        # Verify error message was added
-        mock_messages.error.assert_called_once()
-        error_message = mock_messages.error.call_args[0][1]
-        self.assertIn('Sync failed', error_message)
-        self.assertIn('Login failed', error_message)
-        
-        # Verify no data was saved
-        self.assertEqual(Position.objects.count(), 0)
-        self.assertEqual(Transaction.objects.count(), 0)
-
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_accounts')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
-    def test_sync_workflow_no_accounts(self, mock_login, mock_fetch_accounts):
-        """Test sync workflow when no accounts are found"""
-        mock_login.return_value = None
-        mock_fetch_accounts.return_value = []
-        
-        from django.http import HttpRequest
-        
-        request = HttpRequest()
-        request.method = 'POST'
-        request.user = self.user
-        
-        with patch('apps.tastytrade.views.messages') as mock_messages:
-            with patch('apps.tastytrade.views.redirect') as mock_redirect:
-                sync_tastytrade(request)
-        
-        # Verify error message was added
-        mock_messages.error.assert_called_once()
-        error_message = mock_messages.error.call_args[0][1]
-        self.assertIn('No TastyTrade accounts found', error_message)
-
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_transactions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_positions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_accounts')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
-    def test_sync_deduplication(self, mock_login, mock_fetch_accounts, 
-                               mock_fetch_positions, mock_fetch_transactions):
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+        fetch_positions=DEFAULT, fetch_transactions=DEFAULT,
+    )
+    def test_sync_deduplication(self, login, test_session, fetch_accounts, fetch_positions, fetch_transactions):
         """Test that sync properly handles duplicate data"""
         
         # Create existing position
@@ -339,124 +509,192 @@ class SyncWorkflowIntegrationTests(TestCase):
         )
         
         # Mock API responses with updated data
-        mock_login.return_value = None
-        mock_fetch_accounts.return_value = ['123456789']
-        
-        mock_fetch_positions.return_value = [
-            {
-                'asset_type': 'stock',
-                'symbol': 'AAPL',
-                'description': 'Apple Inc.',
-                'quantity': Decimal('100.0000'),  # Updated quantity
-                'average_price': Decimal('150.25'),  # Updated price
-                'market_value': Decimal('15025.00'),
-                'unrealized_pnl': None,
-                'realized_pnl': None,
-                'delta': None,
-                'theta': None,
-                'beta': None,
-                'expiry': None,
-                'strike': None,
-                'option_type': None
-            }
-        ]
+        login.return_value = None
+        fetch_accounts.return_value = ['123456789']
         
-        mock_fetch_transactions.return_value = [
-            {
-                'transaction_id': 'TXN123',  # Same ID as existing
-                'transaction_type': 'trade',
-                'symbol': 'AAPL',
-                'description': 'Updated description',
-                'quantity': Decimal('100.0000'),
-                'price': Decimal('150.25'),
-                'amount': Decimal('15025.00'),  # Updated amount
-                'trade_date': datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc),
-                'asset_type': 'stock',
-                'expiry': None,
-                'strike': None,
-                'option_type': None
-            }
-        ]
+        fetch_positions.return_value = [_AAPL_POSITION_UPDATE]
+        fetch_transactions.return_value = self._transactions(_AAPL_TRANSACTION_UPDATE)
 
-        from django.http import HttpRequest
-        
-        request = HttpRequest()
-        request.method = 'POST'
-        request.user = self.user
+        request = _make_post_request(self.user)
         
-        with patch('apps.tastytrade.views.messages'):
-            with patch('apps.tastytrade.views.redirect'):
-                sync_tastytrade(request)
+        with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT):
+            sync_tastytrade(request)
         
         # Should still have only one position and one transaction
         self.assertEqual(Position.objects.count(), 1)
         self.assertEqual(Transaction.objects.count(), 1)
         
-        # But data should be updated
+        # But data should be updated, in place on the existing row
         position = Position.objects.first()
+        self.assertEqual(position.pk, existing_position.pk)
         self.assertEqual(position.quantity, Decimal('100.0000'))
         self.assertEqual(position.average_price, Decimal('150.25'))
+        self.assertEqual(position.market_value, Decimal('15025.00'))
+        self.assertEqual(position.description, 'Apple Inc.')
         
         transaction = Transaction.objects.first()
         self.assertEqual(transaction.amount, Decimal('15025.00'))
         self.assertEqual(transaction.description, 'Updated description')
 
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_transactions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_positions')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_accounts')
-    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
-    def test_sync_handles_incomplete_data(self, mock_login, mock_fetch_accounts, 
-                                         mock_fetch_positions, mock_fetch_transactions):
-        """Test that sync handles incomplete or invalid data gracefully"""
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+        fetch_positions=DEFAULT,
+    )
+    def test_identical_resync_of_string_payload_updates_nothing(self, login, test_session, fetch_accounts, fetch_positions):
+        """Test that re-syncing unchanged transactions whose API values are
+        strings doesn't rewrite them"""
+        fetch_accounts.return_value = ['123456789']
+        fetch_positions.return_value = []
+
+        def fetch_transactions(api, account_number, start_date=None, as_model=None):
+            # The API sends decimals as strings; build rows the way fetch_transactions does
+            return [api._build_model(as_model, account_number, _AAPL_TRANSACTION_STRINGS)]
+
+        with patch(
+            'apps.tastytrade.tastytrade_api.TastyTradeAPI.fetch_transactions',
+            autospec=True, side_effect=fetch_transactions,
+        ), patch('apps.tastytrade.tasks._bulk_update') as bulk_update, \
+                patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT):
+            sync_tastytrade(_make_post_request(self.user))
+            sync_tastytrade(_make_post_request(self.user))
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(Transaction.objects.get().amount, Decimal('15025.00'))
+        self.assertEqual(bulk_update.call_count, 2)
+        for call in bulk_update.call_args_list:
+            self.assertEqual(list(call.args[1]), [])
+
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+        fetch_positions=DEFAULT, fetch_transactions=DEFAULT,
+    )
+    def test_sync_matches_stored_option_by_strike(self, login, test_session, fetch_accounts, fetch_positions, fetch_transactions):
+        """Test that an API strike string matches the stored Decimal strike"""
+        expiry = date(2024, 6, 21)
+        existing_position = Position.objects.create(
+            user=self.user,
+            credential=self.credential,
+            tastytrade_account_number='123456789',
+            asset_type='Equity Option',
+            symbol='AAPL  240621C00150000',
+            expiry=expiry,
+            strike=Decimal('150.0000'),
+            option_type='C',
+            quantity=Decimal('1.0000'),
+            current_price=Decimal('4.5000')
+        )
         
-        mock_login.return_value = None
-        mock_fetch_accounts.return_value = ['123456789']
+        fetch_accounts.return_value = ['123456789']
+        fetch_positions.return_value = [{
+            'asset_type': 'Equity Option',
+            'symbol': 'AAPL  240621C00150000',
+            'quantity': Decimal('2.0000'),
+            'current_price': 5.0,
+            'expiry': expiry,
+            'strike': '150.0',
+            'option_type': 'C',
+            'multiplier': 100,
+        }]
+        fetch_transactions.return_value = []
+        
+        with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT):
+            sync_tastytrade(_make_post_request(self.user))
+        
+        # Updated in place, with yesterday's price carried into previous close
+        position = Position.objects.get()
+        self.assertEqual(position.pk, existing_position.pk)
+        self.assertEqual(position.quantity, Decimal('2.0000'))
+        self.assertEqual(position.previous_close_price, Decimal('4.5000'))
+        # (5.00 - 4.50) × 2 contracts × 100
+        self.assertEqual(position.daily_unrealized_pnl, Decimal('100.00'))
+
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+        fetch_positions=DEFAULT, fetch_transactions=DEFAULT,
+    )
+    def test_sync_handles_incomplete_data(self, login, test_session, fetch_accounts, fetch_positions, fetch_transactions):
+        """Test that sync handles incomplete or invalid data gracefully"""
         
-        # Return positions with missing required fields
-        mock_fetch_positions.return_value = [
-            {
-                'asset_type': 'stock',
-                'symbol': None,  # Missing required symbol
-                'quantity': Decimal('100.0000'),
-            },
-            {
-                'asset_type': 'stock',
-                'symbol': 'VALID',  # This one should be saved
-                'quantity': Decimal('50.0000'),
-            }
-        ]
+        login.return_value = None
+        fetch_accounts.return_value = ['123456789']
         
-        # Return transactions with missing required fields
-        mock_fetch_transactions.return_value = [
-            {
-                'transaction_id': None,  # Missing required ID
-                'transaction_type': 'trade',
-                'amount': Decimal('1000.00'),
-                'trade_date': datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc),
-            },
-            {
-                'transaction_id': 'VALID123',  # This one should be saved
-                'transaction_type': 'trade',
-                'amount': Decimal('2000.00'),
-                'trade_date': datetime(2024, 5, 29, 14, 30, 0, tzinfo=timezone.utc),
-            }
+        # Each case mixes an invalid record with a valid one; only the valid
+        # one should be saved. The mocks and request are shared by all cases
+        cases = [
+            ('position without symbol', _INCOMPLETE_POSITIONS, (), ['VALID'], []),
+            ('transaction without id', (), _INCOMPLETE_TRANSACTIONS, [], ['VALID123']),
         ]
+        request = _make_post_request(self.user)
+        
+        for label, positions, transactions, expected_symbols, expected_ids in cases:
+            # The savepoint rolls each case back, so cases don't see each other's rows
+            with self.subTest(label), db_transaction.atomic():
+                fetch_positions.return_value = list(positions)
+                fetch_transactions.return_value = self._transactions(*transactions)
+                
+                with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT):
+                    sync_tastytrade(request)
+                
+                self.assertEqual(list(Position.objects.values_list('symbol', flat=True)), expected_symbols)
+                self.assertEqual(list(Transaction.objects.values_list('transaction_id', flat=True)), expected_ids)
+                db_transaction.set_rollback(True)
+
+
+class SyncWorkflowFailureTests(SimpleTestCase):
+    """Sync failures that stop before the workflow touches the database"""
+
+    databases = set()
+
+    def setUp(self):
+        self.user = User(pk=1, username='testuser', email='test@example.com')
+        # Assigning the one-to-one also caches user.tastytrade_credential,
+        # so the view reads the credential without a query
+        self.credential = TastyTradeCredential(
+            user=self.user,
+            environment='prod',
+            username='testuser',
+            password='testpass'
+        )
 
-        from django.http import HttpRequest
+    @patch('apps.tastytrade.tastytrade_api.TastyTradeAPI.login')
+    def test_sync_workflow_login_failure(self, mock_login):
+        """Test sync workflow when login fails"""
+        mock_login.side_effect = Exception("Login failed: Invalid credentials")
         
-        request = HttpRequest()
-        request.method = 'POST'
-        request.user = self.user
+        request = _make_post_request(self.user)
         
-        with patch('apps.tastytrade.views.messages'):
-            with patch('apps.tastytrade.views.redirect'):
-                sync_tastytrade(request)
+        with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT) as view_mocks:
+            sync_tastytrade(request)
+        mock_messages = view_mocks['messages']
         
-        # Should only save valid records
-        self.assertEqual(Position.objects.count(), 1)
-        position = Position.objects.first()
-        self.assertEqual(position.symbol, 'VALID')
+        # Verify error message was added
+        mock_messages.error.assert_called_once()
+        error_message = mock_messages.error.call_args[0][1]
+        self.assertIn('Sync failed', error_message)
+        self.assertIn('Login failed', error_message)
         
-        self.assertEqual(Transaction.objects.count(), 1)
-        transaction = Transaction.objects.first()
-        self.assertEqual(transaction.transaction_id, 'VALID123')
\ No newline at end of file
+        # Nothing was saved: SimpleTestCase rejects every query, and one would
+        # have replaced this error message with its own
+
+    @patch.multiple(
+        'apps.tastytrade.tastytrade_api.TastyTradeAPI',
+        login=DEFAULT, test_session=DEFAULT, fetch_accounts=DEFAULT,
+    )
+    def test_sync_workflow_no_accounts(self, login, test_session, fetch_accounts):
+        """Test sync workflow when no accounts are found"""
+        login.return_value = None
+        fetch_accounts.return_value = []
+        
+        request = _make_post_request(self.user)
+        
+        with patch.multiple('apps.tastytrade.views', messages=DEFAULT, redirect=DEFAULT) as view_mocks:
+            sync_tastytrade(request)
+        mock_messages = view_mocks['messages']
+        
+        # Verify error message was added
+        mock_messages.error.assert_called_once()
+        error_message = mock_messages.error.call_args[0][1]
+        self.assertIn('No TastyTrade accounts found', error_message)
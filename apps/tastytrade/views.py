@@ -10,13 +10,35 @@ from apps.tastytrade.forms import (
     TastyTradePasswordChangeForm, DeleteAccountConfirmationForm
 )
 from django.utils import timezone
-from django.db import transaction as db_transaction
+from django.db import connection
 from django.db.models import Q
-from .tastytrade_api import TastyTradeAPI
+from django.core.cache import cache
+from .tastytrade_api import TastyTradeAPI, oauth_status_cache_key
+from .tasks import SyncError, run_sync, sync_in_background, sync_tastytrade_task
 import logging
+from datetime import date, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Lifetime of a cached dashboard summary (its key changes on every sync)
+DASHBOARD_CACHE_SECONDS = 300
+
+# Lifetime of a cached oauth_status response; whatever changes the
+# credential or its tokens drops it at once
+OAUTH_STATUS_CACHE_SECONDS = 30
+
+# Lifetime of the cached transaction types list (its key changes on every sync)
+TRANSACTION_TYPES_CACHE_SECONDS = 3600
+
+
+def transaction_types_cache_key(user_id, credential):
+    """Cache key of the distinct transaction types of a credential as of its
+    last sync. A sync in any process gives a new key, so no process has to
+    be told to drop its copy"""
+    last_sync = int(credential.last_sync.timestamp()) if credential.last_sync else 0
+    return f"txn_types:{user_id}:{credential.id}:{last_sync}"
+
+
 # Create your views here.
 
 @login_required
@@ -34,6 +56,7 @@ def connect_tastytrade(request):
             credential.user = user
             # Environment is enforced in the form
             credential.save()
+            cache.delete(oauth_status_cache_key(user.id))
             return redirect('tastytrade_connect')
     else:
         form = TastyTradeCredentialForm(instance=cred, user=user)
@@ -49,6 +72,7 @@ def remove_tastytrade_credential(request):
     try:
         cred = user.tastytrade_credential
         cred.delete()
+        cache.delete(oauth_status_cache_key(user.id))
     except TastyTradeCredential.DoesNotExist:
         pass
     return redirect('tastytrade_connect')
@@ -62,178 +86,128 @@ def sync_tastytrade(request):
         messages.error(request, "No TastyTrade credentials found.")
         return redirect("home")
 
-    api = TastyTradeAPI(credential)
-    try:
-        print(f"DEBUG: Starting sync process using {api.auth_method} authentication...")
-        api.authenticate()
-        print(f"DEBUG: Authentication successful! {api.auth_method.title()} token acquired.")
-        print("DEBUG: Testing session with user info endpoint...")
-        session_test = api.test_session()
-        print(f"DEBUG: Session test result: {session_test}")
-        print("DEBUG: Now attempting to fetch accounts...")
-        account_numbers = api.fetch_accounts()
-        print(f"DEBUG: Account numbers retrieved: {account_numbers}")
-        if not account_numbers:
-            messages.error(request, "No TastyTrade accounts found for this user.")
+    if sync_in_background():
+        task = sync_tastytrade_task.delay(user.id, credential.id)
+        request.session['sync_task_id'] = task.id
+        messages.info(request, "Sync started.")
+    else:
+        try:
+            run_sync(user, credential)
+            messages.success(request, "Sync completed successfully.")
+        except SyncError as e:
+            messages.error(request, str(e))
             return redirect("home")
-        with db_transaction.atomic():
-            for account_number in account_numbers:
-                print(f"DEBUG: Processing account {account_number}")
-                
-                # Get the most recent transaction date for incremental sync
-                last_transaction = Transaction.objects.filter(
-                    user=user,
-                    credential=credential,
-                    tastytrade_account_number=account_number
-                ).order_by('-trade_date').first()
-                
-                start_date = None
-                if last_transaction:
-                    # Get transactions from 1 day before the last transaction to ensure we don't miss any
-                    from datetime import timedelta
-                    start_date = last_transaction.trade_date.date() - timedelta(days=1)
-                    print(f"DEBUG: Incremental sync from {start_date} (last transaction: {last_transaction.trade_date.date()})")
-                else:
-                    print(f"DEBUG: First sync - fetching all transactions")
-                
-                positions = api.fetch_positions(account_number)
-                print(f"DEBUG: Retrieved {len(positions)} positions")
-                
-                transactions = api.fetch_transactions(account_number, start_date=start_date)
-                print(f"DEBUG: Retrieved {len(transactions)} transactions")
-                # Upsert positions with daily P&L tracking
-                for pos in positions:
-                    if pos.get("symbol"):  # Only process if we have a symbol
-                        # Get current price from API data
-                        new_current_price = pos.get("current_price")  # We'll update the API to include this
-                        
-                        # Find existing position to get previous price
-                        try:
-                            existing_position = Position.objects.get(
-                                user=user,
-                                credential=credential,
-                                tastytrade_account_number=account_number,
-                                asset_type=pos.get("asset_type", "other"),
-                                symbol=pos["symbol"],
-                                expiry=pos.get("expiry"),
-                                strike=pos.get("strike"),
-                                option_type=pos.get("option_type"),
-                            )
-                            # Store current price as previous close price
-                            previous_close_price = existing_position.current_price
-                        except Position.DoesNotExist:
-                            # New position - no previous price
-                            previous_close_price = None
-                        
-                        # Calculate daily unrealized P&L if we have both prices
-                        daily_unrealized_pnl = None
-                        if previous_close_price and new_current_price:
-                            quantity = pos.get("quantity", 0)
-                            multiplier = pos.get("multiplier", 1)  # Use multiplier from API
-                            price_diff = float(new_current_price) - float(previous_close_price)
-                            daily_unrealized_pnl = price_diff * float(quantity) * multiplier
-                        
-                        # Calculate proper unrealized P&L: (current_price - average_price) × quantity
-                        corrected_unrealized_pnl = None
-                        if new_current_price and pos.get("average_price"):
-                            quantity = pos.get("quantity", 0)
-                            multiplier = pos.get("multiplier", 1)
-                            avg_price = float(pos.get("average_price", 0))
-                            price_diff = float(new_current_price) - avg_price
-                            corrected_unrealized_pnl = price_diff * float(quantity) * multiplier
-                        
-                        Position.objects.update_or_create(
-                            user=user,
-                            credential=credential,
-                            tastytrade_account_number=account_number,
-                            asset_type=pos.get("asset_type", "other"),
-                            symbol=pos["symbol"],
-                            expiry=pos.get("expiry"),
-                            strike=pos.get("strike"),
-                            option_type=pos.get("option_type"),
-                            defaults={
-                                "description": pos.get("description", ""),
-                                "quantity": pos.get("quantity", 0),
-                                "average_price": pos.get("average_price"),
-                                "current_price": new_current_price,
-                                "previous_close_price": previous_close_price,
-                                "market_value": pos.get("market_value"),
-                                "unrealized_pnl": corrected_unrealized_pnl if corrected_unrealized_pnl is not None else pos.get("unrealized_pnl"),
-                                "daily_unrealized_pnl": daily_unrealized_pnl,
-                                "realized_pnl": 0,  # Only set when position is fully closed
-                                "delta": pos.get("delta"),
-                                "theta": pos.get("theta"),
-                                "beta": pos.get("beta"),
-                            },
-                        )
-                # Upsert transactions with deduplication
-                transactions_saved = 0
-                transactions_skipped = 0
-                transactions_updated = 0
-                
-                # Get existing transaction IDs to avoid unnecessary database queries
-                # Only check recent transactions if doing incremental sync
-                transaction_filter = {
-                    'user': user,
-                    'credential': credential,
-                    'tastytrade_account_number': account_number
-                }
-                if start_date:
-                    from datetime import timedelta
-                    # Include a buffer to ensure we catch all relevant transactions
-                    buffer_date = start_date - timedelta(days=2)
-                    transaction_filter['trade_date__gte'] = buffer_date
-                
-                existing_transaction_ids = set(
-                    Transaction.objects.filter(**transaction_filter).values_list('transaction_id', flat=True)
-                )
-                
-                for txn in transactions:
-                    transaction_id = txn.get("transaction_id")
-                    trade_date = txn.get("trade_date")
-                    
-                    if not transaction_id or not trade_date:
-                        transactions_skipped += 1
-                        print(f"DEBUG: Skipped transaction - missing ID ({transaction_id}) or date ({trade_date})")
-                        continue
-                    
-                    # Use Django's update_or_create to handle duplicates properly
-                    transaction_obj, created = Transaction.objects.update_or_create(
-                        user=user,
-                        credential=credential,
-                        tastytrade_account_number=account_number,
-                        transaction_id=transaction_id,
-                        defaults={
-                            "transaction_type": txn.get("transaction_type", "other"),
-                            "symbol": txn.get("symbol", ""),
-                            "description": txn.get("description", ""),
-                            "quantity": txn.get("quantity"),
-                            "price": txn.get("price"),
-                            "amount": txn.get("amount", 0),
-                            "trade_date": trade_date,
-                            "asset_type": txn.get("asset_type", ""),
-                            "expiry": txn.get("expiry"),
-                            "strike": txn.get("strike"),
-                            "option_type": txn.get("option_type"),
-                        }
-                    )
-                    
-                    if created:
-                        transactions_saved += 1
-                    else:
-                        transactions_updated += 1
-                
-                print(f"DEBUG: Transaction summary for account {account_number}: {transactions_saved} new, {transactions_updated} updated, {transactions_skipped} skipped")
-            credential.last_sync = timezone.now()
-            credential.save(update_fields=["last_sync"])
-        messages.success(request, "Sync completed successfully.")
-    except Exception as e:
-        messages.error(request, f"Sync failed: {e}")
+        except Exception as e:
+            messages.error(request, f"Sync failed: {e}")
     
     # Return to the page where sync was initiated
     next_url = request.META.get('HTTP_REFERER', '/')
     return redirect(next_url)
 
+@login_required
+def sync_status(request):
+    """State of the user's background sync, for the page to poll while it
+    runs (checked by BackgroundSyncMiddleware)"""
+    status = getattr(request, 'background_sync', None)
+    return JsonResponse(status or {'task_id': None, 'state': None, 'error': None})
+
+def _dashboard_stats(user, credential, today):
+    """Portfolio summary of the dashboard; only plain values and model
+    instances, so the dict can be cached"""
+    stats = {}
+    
+    # Get accounts for P&L calculations (available_accounts now from context processor)
+    accounts = Position.objects.filter(
+        user=user, 
+        credential=credential
+    ).values_list('tastytrade_account_number', flat=True).distinct()
+    
+    # Get recent transactions (yesterday and today - from previous market close)
+    yesterday = today - timedelta(days=1)
+    
+    # Recent activity includes yesterday and today (previous close through today)
+    recent_transactions = Transaction.objects.filter(
+        user=user,
+        credential=credential,
+        trade_date__date__gte=yesterday  # Yesterday and today
+    ).order_by('-trade_date', '-created_at')[:10]
+    
+    # Also get just today's transactions for P&L calculation
+    todays_transactions = Transaction.objects.filter(
+        user=user,
+        credential=credential,
+        trade_date__date=today
+    ).order_by('-trade_date')
+    
+    stats['todays_transactions'] = list(recent_transactions)  # Show recent for display
+    stats['has_recent_activity'] = bool(stats['todays_transactions'])
+    stats['todays_transactions_count'] = todays_transactions.count()
+    stats['recent_transactions_date_range'] = f"{yesterday.strftime('%m/%d')} - {today.strftime('%m/%d')}"
+    
+    # Get summary statistics
+    total_positions = Position.objects.filter(user=user, credential=credential).count()
+    stats['total_positions'] = total_positions
+    
+    # Calculate today's REALIZED P&L from transactions
+    from django.db import models
+    todays_realized_pnl = todays_transactions.aggregate(
+        total_pnl=models.Sum('amount')
+    )['total_pnl'] or 0
+    stats['todays_realized_pnl'] = todays_realized_pnl
+    
+    # Calculate position statistics
+    positions = Position.objects.filter(user=user, credential=credential)
+    position_stats = positions.aggregate(
+        total_unrealized=models.Sum('unrealized_pnl'),
+        daily_unrealized=models.Sum('daily_unrealized_pnl'),
+        total_market_value=models.Sum('market_value')
+    )
+    
+    total_unrealized_pnl = position_stats['total_unrealized'] or 0
+    daily_unrealized_pnl = position_stats['daily_unrealized'] or 0
+    total_market_value = position_stats['total_market_value'] or 0
+    
+    stats['total_unrealized_pnl'] = total_unrealized_pnl
+    stats['daily_unrealized_pnl'] = daily_unrealized_pnl
+    stats['total_market_value'] = total_market_value
+    
+    # Calculate total daily P&L (realized + daily unrealized change)
+    stats['todays_total_pnl'] = todays_realized_pnl + daily_unrealized_pnl
+    
+    # Calculate per-account statistics for dashboard
+    account_stats = {}
+    for account in accounts:
+        account_positions = positions.filter(tastytrade_account_number=account)
+        account_transactions = todays_transactions.filter(tastytrade_account_number=account)
+        
+        account_portfolio_stats = account_positions.aggregate(
+            market_value=models.Sum('market_value'),
+            unrealized_pnl=models.Sum('unrealized_pnl'),
+            daily_unrealized=models.Sum('daily_unrealized_pnl'),
+            delta=models.Sum('delta'),
+            theta=models.Sum('theta'),
+        )
+        
+        account_realized_pnl = account_transactions.aggregate(
+            total_pnl=models.Sum('amount')
+        )['total_pnl'] or 0
+        
+        account_stats[account] = {
+            'positions_count': account_positions.count(),
+            'market_value': account_portfolio_stats['market_value'] or 0,
+            'unrealized_pnl': account_portfolio_stats['unrealized_pnl'] or 0,
+            'daily_unrealized_pnl': account_portfolio_stats['daily_unrealized'] or 0,
+            'realized_pnl_today': account_realized_pnl,
+            'total_daily_pnl': account_realized_pnl + (account_portfolio_stats['daily_unrealized'] or 0),
+            'delta': account_portfolio_stats['delta'],
+            'theta': account_portfolio_stats['theta'],
+            'transactions_today': account_transactions.count(),
+        }
+    
+    stats['account_stats'] = account_stats
+    return stats
+
+
 @login_required
 def dashboard(request):
     context = {}
@@ -243,97 +217,17 @@ def dashboard(request):
         credential = request.user.tastytrade_credential
         context['tastytrade_credential'] = credential
         
-        # Get accounts for P&L calculations (available_accounts now from context processor)
-        accounts = Position.objects.filter(
-            user=request.user, 
-            credential=credential
-        ).values_list('tastytrade_account_number', flat=True).distinct()
-        
-        # Get recent transactions (yesterday and today - from previous market close)
-        from datetime import date, timedelta
+        # Portfolio state only changes at sync time: a new sync (or a new
+        # day) gives a new key, and the stale entry expires on its own
         today = date.today()
-        yesterday = today - timedelta(days=1)
-        
-        # Recent activity includes yesterday and today (previous close through today)
-        recent_transactions = Transaction.objects.filter(
-            user=request.user,
-            credential=credential,
-            trade_date__date__gte=yesterday  # Yesterday and today
-        ).order_by('-trade_date', '-created_at')[:10]
-        
-        # Also get just today's transactions for P&L calculation
-        todays_transactions = Transaction.objects.filter(
-            user=request.user,
-            credential=credential,
-            trade_date__date=today
-        ).order_by('-trade_date')
-        
-        context['todays_transactions'] = recent_transactions  # Show recent for display
-        context['has_recent_activity'] = recent_transactions.exists()
-        context['todays_transactions_count'] = todays_transactions.count()
-        context['recent_transactions_date_range'] = f"{yesterday.strftime('%m/%d')} - {today.strftime('%m/%d')}"
-        
-        # Get summary statistics
-        total_positions = Position.objects.filter(user=request.user, credential=credential).count()
-        context['total_positions'] = total_positions
-        
-        # Calculate today's REALIZED P&L from transactions
-        from django.db import models
-        todays_realized_pnl = todays_transactions.aggregate(
-            total_pnl=models.Sum('amount')
-        )['total_pnl'] or 0
-        context['todays_realized_pnl'] = todays_realized_pnl
-        
-        # Calculate position statistics
-        positions = Position.objects.filter(user=request.user, credential=credential)
-        position_stats = positions.aggregate(
-            total_unrealized=models.Sum('unrealized_pnl'),
-            daily_unrealized=models.Sum('daily_unrealized_pnl'),
-            total_market_value=models.Sum('market_value')
-        )
-        
-        total_unrealized_pnl = position_stats['total_unrealized'] or 0
-        daily_unrealized_pnl = position_stats['daily_unrealized'] or 0
-        total_market_value = position_stats['total_market_value'] or 0
-        
-        context['total_unrealized_pnl'] = total_unrealized_pnl
-        context['daily_unrealized_pnl'] = daily_unrealized_pnl
-        context['total_market_value'] = total_market_value
-        
-        # Calculate total daily P&L (realized + daily unrealized change)
-        context['todays_total_pnl'] = todays_realized_pnl + daily_unrealized_pnl
-        
-        # Calculate per-account statistics for dashboard
-        account_stats = {}
-        for account in accounts:
-            account_positions = positions.filter(tastytrade_account_number=account)
-            account_transactions = todays_transactions.filter(tastytrade_account_number=account)
-            
-            account_portfolio_stats = account_positions.aggregate(
-                market_value=models.Sum('market_value'),
-                unrealized_pnl=models.Sum('unrealized_pnl'),
-                daily_unrealized=models.Sum('daily_unrealized_pnl'),
-                delta=models.Sum('delta'),
-                theta=models.Sum('theta'),
-            )
-            
-            account_realized_pnl = account_transactions.aggregate(
-                total_pnl=models.Sum('amount')
-            )['total_pnl'] or 0
-            
-            account_stats[account] = {
-                'positions_count': account_positions.count(),
-                'market_value': account_portfolio_stats['market_value'] or 0,
-                'unrealized_pnl': account_portfolio_stats['unrealized_pnl'] or 0,
-                'daily_unrealized_pnl': account_portfolio_stats['daily_unrealized'] or 0,
-                'realized_pnl_today': account_realized_pnl,
-                'total_daily_pnl': account_realized_pnl + (account_portfolio_stats['daily_unrealized'] or 0),
-                'delta': account_portfolio_stats['delta'],
-                'theta': account_portfolio_stats['theta'],
-                'transactions_today': account_transactions.count(),
-            }
+        last_sync = int(credential.last_sync.timestamp()) if credential.last_sync else 0
+        cache_key = f"dash:{request.user.id}:{last_sync}:{today.isoformat()}"
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = _dashboard_stats(request.user, credential, today)
+            cache.set(cache_key, stats, timeout=DASHBOARD_CACHE_SECONDS)
+        context.update(stats)
         
-        context['account_stats'] = account_stats
         
     except TastyTradeCredential.DoesNotExist:
         context['tastytrade_credential'] = None
@@ -388,6 +282,7 @@ def oauth_callback(request):
     
     try:
         token_data = api.exchange_code_for_tokens(authorization_code)
+        cache.delete(oauth_status_cache_key(user.id))
         messages.success(request, "OAuth authorization successful! You can now sync your data.")
         return redirect('tastytrade_connect')
     except Exception as e:
@@ -397,27 +292,33 @@ def oauth_callback(request):
 
 @login_required
 def oauth_status(request):
-    """Check OAuth authorization status"""
+    """Check OAuth authorization status (cached briefly: the page polls it)"""
     user = request.user
+    cache_key = oauth_status_cache_key(user.id)
+    status = cache.get(cache_key)
+    if status is not None:
+        return JsonResponse(status)
+    
     try:
         credential = user.tastytrade_credential
         api = TastyTradeAPI(credential)
         
         status = {
-            'oauth_configured': api._can_use_oauth(),
+            'oauth_configured': bool(api._can_use_oauth()),
             'has_access_token': bool(credential.access_token),
             'has_refresh_token': bool(credential.refresh_token),
             'auth_method': api.auth_method,
         }
-        
-        return JsonResponse(status)
     except TastyTradeCredential.DoesNotExist:
-        return JsonResponse({
+        status = {
             'oauth_configured': False,
             'has_access_token': False,
             'has_refresh_token': False,
             'auth_method': 'none',
-        })
+        }
+    
+    cache.set(cache_key, status, OAUTH_STATUS_CACHE_SECONDS)
+    return JsonResponse(status)
 
 @login_required
 def revoke_oauth(request):
@@ -428,6 +329,7 @@ def revoke_oauth(request):
         credential.access_token = None
         credential.refresh_token = None
         credential.save()
+        cache.delete(oauth_status_cache_key(user.id))
         messages.success(request, "OAuth authorization has been revoked.")
     except TastyTradeCredential.DoesNotExist:
         messages.error(request, "No TastyTrade credentials found.")
@@ -531,14 +433,7 @@ def positions(request, account_number=None):
         
         # Combine and deduplicate years
         years = sorted(set(fee_years + all_years), reverse=True)
-        
-        # Debug output - check what transaction types actually exist
-        all_transaction_types = all_transactions.values_list('transaction_type', flat=True).distinct()
-        print(f"DEBUG: All transaction types in database: {list(all_transaction_types)}")
-        print(f"DEBUG: Found {fee_interest_transactions.count()} fee/interest transactions with filter: {fee_interest_filter}")
-        print(f"DEBUG: Fee years: {fee_years}")
-        print(f"DEBUG: All transaction years: {all_years}")
-        print(f"DEBUG: Combined years: {years}")
+        logger.debug("Fee years: %s, all transaction years: %s", fee_years, all_years)
         
         for year in years:
             # Calculate fees for this year (Regulatory fee adjustments)
@@ -722,13 +617,26 @@ def transactions(request, account_number=None):
         
         # Apply search filter if provided
         search_query = request.GET.get('search', '').strip()
+        search_ranked = False
         if search_query:
             from django.db import models
-            transactions = transactions.filter(
+            substring_match = (
                 models.Q(symbol__icontains=search_query) |
                 models.Q(description__icontains=search_query) |
                 models.Q(transaction_type__icontains=search_query)
             )
+            if connection.vendor == 'postgresql':
+                # Whole-word hits through the search_vector GIN index, ranked;
+                # the (trigram-indexed) substring match still finds partial
+                # symbols such as "AAP"
+                from django.contrib.postgres.search import SearchQuery, SearchRank
+                query = SearchQuery(search_query, config='simple', search_type='websearch')
+                transactions = transactions.annotate(
+                    search_rank=SearchRank(models.F('search_vector'), query)
+                ).filter(models.Q(search_vector=query) | substring_match)
+                search_ranked = True
+            else:
+                transactions = transactions.filter(substring_match)
             context['search_query'] = search_query
         
         # Apply transaction type filter
@@ -737,13 +645,19 @@ def transactions(request, account_number=None):
             transactions = transactions.filter(transaction_type=transaction_type)
             context['selected_type'] = transaction_type
         
-        # Get unique transaction types for filter dropdown
-        transaction_types = Transaction.objects.filter(
-            user=request.user,
-            credential=credential
-        ).values_list('transaction_type', flat=True).distinct().order_by('transaction_type')
-        
-        context['transaction_types'] = [t for t in transaction_types if t]
+        # Get unique transaction types for filter dropdown; they only change
+        # at sync time, which moves the cached list to a new key
+        context['transaction_types'] = cache.get_or_set(
+            transaction_types_cache_key(request.user.id, credential),
+            lambda: [
+                t for t in Transaction.objects.filter(
+                    user=request.user,
+                    credential=credential
+                ).values_list('transaction_type', flat=True).distinct().order_by('transaction_type')
+                if t
+            ],
+            TRANSACTION_TYPES_CACHE_SECONDS,
+        )
         
         # Handle sorting
         sort_by = request.GET.get('sort', '-trade_date')  # Default: newest first
@@ -767,8 +681,10 @@ def transactions(request, account_number=None):
                 'FULLYPAID LENDING REBATE'     # Interest rebates
             ]
         )
-        trading_transactions = transactions.exclude(fee_interest_filter).order_by(sort_by)
-        fee_interest_transactions = transactions.filter(fee_interest_filter).order_by(sort_by)
+        # Best search matches first unless a sort was picked
+        ordering = ['-search_rank', sort_by] if search_ranked and 'sort' not in request.GET else [sort_by]
+        trading_transactions = transactions.exclude(fee_interest_filter).order_by(*ordering)
+        fee_interest_transactions = transactions.filter(fee_interest_filter).order_by(*ordering)
         
         context.update({
             'current_sort': sort_field,
@@ -783,25 +699,21 @@ def transactions(request, account_number=None):
         page_obj = paginator.get_page(page_number)
         context['transactions'] = page_obj
         context['fee_interest_transactions'] = fee_interest_transactions
-        context['total_transactions'] = trading_transactions.count()
-        context['total_fees_interest'] = fee_interest_transactions.count()
+        # The paginator has already counted the trading transactions
+        context['total_transactions'] = paginator.count
         
-        # Calculate summary statistics for trading transactions only
+        # Trading and fee/interest summaries in one pass over the filtered rows
         from django.db import models
-        trading_stats = trading_transactions.aggregate(
-            total_amount=models.Sum('amount'),
-            avg_amount=models.Avg('amount'),
-        )
-        
-        # Calculate fee/interest totals separately
-        fee_interest_stats = fee_interest_transactions.aggregate(
-            total_fees_interest=models.Sum('amount'),
+        summary_stats = transactions.aggregate(
+            total_amount=models.Sum('amount', filter=~fee_interest_filter),
+            avg_amount=models.Avg('amount', filter=~fee_interest_filter),
+            total_fees_interest=models.Sum('amount', filter=fee_interest_filter),
         )
         
         context.update({
-            'total_amount': trading_stats['total_amount'] or 0,
-            'avg_amount': trading_stats['avg_amount'] or 0,
-            'total_fees_interest': fee_interest_stats['total_fees_interest'] or 0,
+            'total_amount': summary_stats['total_amount'] or 0,
+            'avg_amount': summary_stats['avg_amount'] or 0,
+            'total_fees_interest': summary_stats['total_fees_interest'] or 0,
         })
         
         # Add account-specific title
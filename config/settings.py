@@ -63,7 +63,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.tastytrade.middleware.TastyTradeCredentialMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.tastytrade.middleware.BackgroundSyncMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
 ]
@@ -154,6 +156,30 @@ TASTYTRADE_OAUTH_CLIENT_ID = env('TASTYTRADE_OAUTH_CLIENT_ID', default=None)
 TASTYTRADE_OAUTH_CLIENT_SECRET = env('TASTYTRADE_OAUTH_CLIENT_SECRET', default=None)  
 TASTYTRADE_OAUTH_REDIRECT_URI = env('TASTYTRADE_OAUTH_REDIRECT_URI', default='http://localhost:8000/tastytrade/oauth/callback/')
 
+# Redis (optional) - caches TastyTrade account lookups when requests-cache is installed
+REDIS_URL = env('REDIS_URL', default=None)
+TASTYTRADE_API_CACHE_SECONDS = env.int('TASTYTRADE_API_CACHE_SECONDS', default=60)
+
+# Django's cache (dashboard summaries): Redis when configured, else the
+# per-process default
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Rows per INSERT/UPDATE statement when sync writes positions and transactions
+TASTY_BULK_BATCH_SIZE = env.int('TASTY_BULK_BATCH_SIZE', default=500)
+
+# Celery (optional) - with celery installed and a broker set, sync runs as a
+# background task; otherwise it runs inside the request. Needs its own
+# setting: REDIS_URL alone only turns on caching, and a queued sync with no
+# worker running would never finish
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=None)
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -0,0 +1,64 @@
+"""
+Django settings for running the test suite.
+
+Extends config.settings with test-only speedups. Used by pytest via
+pytest.ini, or: python manage.py test --settings=config.settings_test
+
+Migrations are skipped: the schema is created from the models. Run with
+TEST_RUN_MIGRATIONS=1 to build it through the migration files instead.
+"""
+
+import os
+
+# The base settings read the PostgreSQL connection unconditionally; tests
+# don't use it, so don't require a .env to import them
+for _name in ('POSTGRES_DB', 'POSTGRES_USER', 'POSTGRES_PASSWORD'):
+    os.environ.setdefault(_name, 'unused')
+
+from .settings import *  # noqa: E402,F401,F403
+
+# Hashing strength is irrelevant in tests; PBKDF2 dominates create_user()
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# The test database is a scratchpad: keep it RAM-resident, no disk I/O.
+# The migrations are backend-neutral and SQLite enforces the unique_together
+# and unique constraints the model tests exercise, so TestCase suites run
+# unchanged here
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'NAME': ':memory:'},
+    }
+}
+
+
+class _DisableMigrations:
+    """MIGRATION_MODULES value that reports "no migrations" for every app"""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+# Build the test schema straight from the current models (as migrate
+# --run-syncdb does) instead of replaying every migration. Set
+# TEST_RUN_MIGRATIONS=1 to exercise the real migrations
+if os.environ.get('TEST_RUN_MIGRATIONS') != '1':
+    MIGRATION_MODULES = _DisableMigrations()
+
+# No test asserts password strength rules; skip them wherever a form
+# validates a password
+AUTH_PASSWORD_VALIDATORS = []
+
+# Run sync inside the request, whatever the environment's broker setting
+CELERY_BROKER_URL = None
+
+# No Redis whatever the environment says: API clients get plain sessions,
+# so no test opens a Redis connection or reads a cached API response
+REDIS_URL = None
+
+# Per-process cache; the test conftest clears it between tests
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}